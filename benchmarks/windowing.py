@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# global
+import ivy
+import time
+import argparse
+import numpy as np
+
+
+def _loop_windows(x, window_size):
+    # index grids rebuilt on every call, one arange per window
+    num_windows = x.shape[0] - window_size + 1
+    gather_idxs_list = list()
+    for w_idx in range(num_windows):
+        gather_idxs_list.append(
+            ivy.expand_dims(ivy.arange(w_idx, w_idx + window_size, 1), axis=0)
+        )
+    gather_idxs = ivy.reshape(ivy.concat(gather_idxs_list, axis=0), (-1, 1))
+    return ivy.reshape(
+        ivy.gather_nd(x, gather_idxs), (num_windows, window_size) + x.shape[1:]
+    )
+
+
+def _table_windows(x, table):
+    # precomputed [num_windows, window_size] table, a single gather
+    return ivy.gather(x, ivy.array(table), axis=0)
+
+
+def _time(fn, num_repeats):
+    fn()
+    start_time = time.perf_counter()
+    for _ in range(num_repeats):
+        fn()
+    return (time.perf_counter() - start_time) / num_repeats
+
+
+def main(seq_len=100, frame_size=64, window_sizes=None, num_repeats=100):
+    window_sizes = ivy.default(window_sizes, [1, 2, 4, 8, 16, 32])
+    x = ivy.array(np.random.uniform(size=(seq_len, frame_size)).astype(np.float32))
+    print("seq_len {}, frame_size {}".format(seq_len, frame_size))
+    print("window_size    loop (ms)    table (ms)    speedup")
+    for window_size in window_sizes:
+        num_windows = seq_len - window_size + 1
+        table = np.arange(num_windows)[:, None] + np.arange(window_size)
+        assert np.array_equal(
+            ivy.to_numpy(_loop_windows(x, window_size)),
+            ivy.to_numpy(_table_windows(x, table)),
+        )
+        loop_time = _time(lambda: _loop_windows(x, window_size), num_repeats)
+        table_time = _time(lambda: _table_windows(x, table), num_repeats)
+        print(
+            "{:>11}    {:>9.3f}    {:>10.3f}    {:>6.1f}x".format(
+                window_size, loop_time * 1e3, table_time * 1e3, loop_time / table_time
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--backend", type=str, default="numpy", help="The ivy backend to use."
+    )
+    parser.add_argument(
+        "--seq_len", type=int, default=100, help="The length of the sequence."
+    )
+    parser.add_argument(
+        "--frame_size", type=int, default=64, help="The number of values per frame."
+    )
+    parser.add_argument(
+        "--window_sizes",
+        type=int,
+        nargs="+",
+        help="The window sizes to benchmark.",
+    )
+    parser.add_argument(
+        "--num_repeats", type=int, default=100, help="The number of timed repeats."
+    )
+    parsed_args = parser.parse_args()
+    ivy.set_backend(parsed_args.backend)
+    main(
+        parsed_args.seq_len,
+        parsed_args.frame_size,
+        parsed_args.window_sizes,
+        parsed_args.num_repeats,
+    )
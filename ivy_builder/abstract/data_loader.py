@@ -32,6 +32,26 @@ class DataLoader(abc.ABC):
         """
         raise NotImplementedError
 
+    def stats(self):
+        """
+        get the per-stage loading statistics as an ivy.Container, or None if the data
+        loader does not record any
+        """
+        return None
+
+    def state_dict(self):
+        """
+        get the iteration state as a dict of ints and lists of ints, or None if the data
+        loader cannot be resumed
+        """
+        return None
+
+    def load_state_dict(self, state):
+        """
+        resume iterating from a state previously returned by state_dict
+        """
+        pass
+
     def close(self):
         """
         Close this dataset, and destroy all child objects or processes which may not be garbage collected.
@@ -24,7 +24,8 @@ from ivy_builder.builder import (
     trainer_to_spec_args_dict,
     save_dict_as_json,
 )
-from ivy_builder.checkpoints import Checkpoint, CheckpointManager
+from ivy_builder.summaries import nested_stats, EventFileWriter, AsyncSummaryWriter
+from ivy_builder.checkpoints import Checkpoint, CheckpointManager, save_checkpoint
 
 logging.getLogger().setLevel(logging.INFO)
 logging.basicConfig(format="%(message)s")
@@ -67,15 +68,15 @@ class Trainer:
         self._chkpt = None
         self._chkpt_manager = None
 
-        # summary writer
+        # summary writer, writing from a background thread
         try:
             from torch.utils.tensorboard import SummaryWriter
         except ModuleNotFoundError:
-            SummaryWriter = None
-        if SummaryWriter is not None:
-            self._writer = SummaryWriter(os.path.join(self._spec.log_dir, "tnsrbrd"))
-        else:
-            self._writer = None
+            SummaryWriter = EventFileWriter
+        self._writer = AsyncSummaryWriter(
+            SummaryWriter(os.path.join(self._spec.log_dir, "tnsrbrd")),
+            self._spec.summary_queue_size,
+        )
 
         # profiler
         self._profiling = self._spec.steps_to_profile > 0
@@ -233,12 +234,20 @@ class Trainer:
         pathlib.Path(os.path.join(self._spec.log_dir, "chkpts")).mkdir(
             parents=True, exist_ok=True
         )
-        self._chkpt = Checkpoint(optimizer=self._optimizer, net=self._network)
+        self._chkpt = Checkpoint(
+            optimizer=self._optimizer,
+            net=self._network,
+            data_loader=self._spec.data_loader,
+        )
         self._chkpt_manager = CheckpointManager(
             self._chkpt,
             os.path.join(self._spec.log_dir, "chkpts"),
-            20,
+            self._spec.max_checkpoints_to_keep,
             step_counter=self._global_step,
+            async_writes=self._spec.async_checkpointing,
+            keep_every_n_steps=self._spec.keep_checkpoint_every_n_steps,
+            keep_best=self._spec.keep_best_checkpoints,
+            checkpoint_format=self._spec.checkpoint_format,
         )
 
     def _log_scalars(self):
@@ -253,6 +262,8 @@ class Trainer:
                 self._writer.add_scalar(
                     "learning rate", self._learning_rate, self._global_step
                 )
+            if self._spec.log_data_loader_stats:
+                self._log_data_loader_stats(self._global_step)
         self._write_scalar_summaries(
             self._spec.data_loader,
             self._network,
@@ -262,75 +273,11 @@ class Trainer:
         self._start_time = time.perf_counter()
 
     def _log_nested(self, nest, global_step, name_hierarchy, spec):
-        if not ivy.exists(self._writer):
-            raise Exception(
-                "torch must be installed in order to use the file writer for tensorboard logging."
-            )
-        if "global_vector_norm" in spec:
-            self._writer.add_scalar(
-                name_hierarchy + "/global vector norm",
-                ivy.to_scalar(ivy.to_native(nest.vector_norm(global_norm=True))),
-                global_step,
-            )
-        for k, v in nest.items():
-            new_name_hierarchy = name_hierarchy + "/" + k
-            if isinstance(v, dict):
-                self._log_nested(v, global_step, new_name_hierarchy, spec)
-            else:
-                if "mean" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/mean",
-                        ivy.to_scalar(ivy.to_native(ivy.mean(v))),
-                        global_step,
-                    )
-                if "abs_mean" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/abs mean",
-                        ivy.to_scalar(ivy.to_native(ivy.mean(ivy.abs(v)))),
-                        global_step,
-                    )
-                if "var" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/var",
-                        ivy.to_scalar(ivy.to_native(ivy.var(v))),
-                        global_step,
-                    )
-                if "abs_var" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/abs var",
-                        ivy.to_scalar(ivy.to_native(ivy.var(ivy.abs(v)))),
-                        global_step,
-                    )
-                if "min" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/min",
-                        ivy.to_scalar(ivy.to_native(ivy.min(v))),
-                        global_step,
-                    )
-                if "abs_min" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/abs min",
-                        ivy.to_scalar(ivy.to_native(ivy.min(ivy.abs(v)))),
-                        global_step,
-                    )
-                if "max" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/max",
-                        ivy.to_scalar(ivy.to_native(ivy.max(v))),
-                        global_step,
-                    )
-                if "abs_max" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/abs max",
-                        ivy.to_scalar(ivy.to_native(ivy.max(ivy.abs(v)))),
-                        global_step,
-                    )
-                if "vector_norm" in spec:
-                    self._writer.add_scalar(
-                        new_name_hierarchy + "/vector norm",
-                        ivy.to_scalar(ivy.to_native(ivy.vector_norm(v))),
-                        global_step,
-                    )
+        scalars = [
+            (name_hierarchy + "/" + name, value)
+            for name, value in nested_stats(nest, spec)
+        ]
+        self._writer.add_scalars(scalars, global_step)
 
     def _log_gradients(self, grads, global_step):
         self._log_nested(grads, global_step, "gradients", self._spec.log_gradients)
@@ -347,10 +294,6 @@ class Trainer:
         )
 
     def _log_memory(self, global_step):
-        if not ivy.exists(self._writer):
-            raise Exception(
-                "torch must be installed in order to use the file writer for tensorboard logging."
-            )
         self._writer.add_scalar(
             "memory/RAM/global/percent_used",
             ivy.percent_used_mem_on_dev("cpu"),
@@ -371,11 +314,18 @@ class Trainer:
                 global_step,
             )
 
-    def _log_device_utilization(self, global_step):
-        if not ivy.exists(self._writer):
-            raise Exception(
-                "torch must be installed in order to use the file writer for tensorboard logging."
+    def _log_data_loader_stats(self, global_step):
+        stats = self._spec.data_loader.stats()
+        if not ivy.exists(stats):
+            return
+        for key_chain, value in zip(
+            stats.cont_all_key_chains(), stats.cont_to_flat_list()
+        ):
+            self._writer.add_scalar(
+                "data_loader/{}".format(key_chain), value, global_step
             )
+
+    def _log_device_utilization(self, global_step):
         self._writer.add_scalar("dev_util/CPU", ivy.dev_util("cpu"), global_step)
         for ds in self._spec.dev_strs:
             if "gpu" not in ds:
@@ -387,10 +337,6 @@ class Trainer:
 
     # noinspection PyProtectedMember
     def _log_device_tuning(self, global_step):
-        if not ivy.exists(self._writer):
-            raise Exception(
-                "torch must be installed in order to use the file writer for tensorboard logging."
-            )
         if not ivy.exists(self._dev_manager):
             raise Exception(
                 "Cannot log device manager tuning if the device manager does not exist."
@@ -443,8 +389,23 @@ class Trainer:
                 )
 
     def _save(self):
-        self._chkpt_manager.save(self._global_step)
-        logging.info("network checkpoint saved @ step " + str(self._global_step))
+        if self._spec.keep_best_checkpoints > 0:
+            # the best checkpoints are those with the lowest moving average loss
+            metric = (
+                ivy.to_scalar(self._moving_average_loss)
+                if ivy.is_array(self._moving_average_loss)
+                else self._moving_average_loss
+            )
+        else:
+            metric = None
+        self._chkpt_manager.save(self._global_step, metric)
+        if self._spec.async_checkpointing:
+            logging.info(
+                "network checkpoint saving in the background @ step "
+                + str(self._global_step)
+            )
+        else:
+            logging.info("network checkpoint saved @ step " + str(self._global_step))
 
     def _save_spec_to_disk(self):
         # remove/create log dir
@@ -716,21 +677,26 @@ class Trainer:
     def save(self, checkpoint_path: str) -> None:
         """
         save the network weights and optimizer state in checkpoint file
-        :param checkpoint_path: path of the checkpoint file for saving the weights and optimizer state
+        :param checkpoint_path: path of the checkpoint file for saving the weights and
+                                optimizer state, saved memory mapped if ending in
+                                .mmap, otherwise as hdf5
         """
         checkpoint = ivy.Container(
             {"network": self._network.v, "optimizer": self._optimizer.state}
         )
         os.makedirs("/".join(checkpoint_path.split("/")[:-1]), exist_ok=True)
-        checkpoint.cont_to_disk_as_hdf5(checkpoint_path)
+        save_checkpoint(checkpoint, checkpoint_path)
 
-    def restore(self, checkpoint_path: str, global_step: int = None) -> None:
+    def restore(
+        self, checkpoint_path: str, global_step: int = None, v_keychains=None
+    ) -> None:
         """
         restore the network weights from checkpoint file
         :param checkpoint_path: path of the checkpoint file for loading the weights
         :param global_step: training step to start at for continued training
+        :param v_keychains: key chains of the variables to restore, default is all
         """
-        self._chkpt.restore(checkpoint_path)
+        self._chkpt.restore(checkpoint_path, v_keychains)
         if global_step is not None:
             self._global_step = global_step
 
@@ -761,6 +727,12 @@ class Trainer:
         """
         # if ivy.exists(self._dev_manager):
         #     self._dev_manager.__del__()
+        if ivy.exists(self._chkpt_manager):
+            # the pending checkpoint is written before closing
+            self._chkpt_manager.close()
+        if ivy.exists(self._writer):
+            # the pending summaries are written before closing
+            self._writer.close()
         self._spec.data_loader.close()
 
     # Getters #
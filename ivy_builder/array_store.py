@@ -0,0 +1,108 @@
+# global
+import os
+import json
+import struct
+import functools
+import numpy as np
+
+MAGIC = b"IVYARRS1"
+ALIGNMENT = 64
+
+# file layout:
+#   magic (8 bytes) | header length (uint64) | json header | aligned raw array blobs
+# the header maps each key to its dtype, shape and byte offset from the file start
+
+
+def _aligned(num_bytes):
+    return int(np.ceil(num_bytes / ALIGNMENT) * ALIGNMENT)
+
+
+def save_arrays(fpath, arrays, meta=None):
+    """
+    Save a flat dict of numpy arrays to a single file, which can later be memory
+    mapped without copying via load_arrays.
+
+    :param fpath: The filepath to save the arrays to.
+    :param arrays: Dict of str keys to numpy arrays.
+    :param meta: Optional json serializable dict stored alongside the arrays.
+    """
+    arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+    descriptors = dict()
+    offset = 0
+    for key, array in arrays.items():
+        descriptors[key] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += _aligned(array.nbytes)
+
+    # the offsets are stored in the header, so grow the data start until it fits
+    header = {"arrays": descriptors, "meta": meta if meta is not None else dict()}
+    data_start = 0
+    while True:
+        header_bytes = json.dumps(header).encode()
+        required_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+        if required_start <= data_start:
+            break
+        for descriptor in descriptors.values():
+            descriptor["offset"] += required_start - data_start
+        data_start = required_start
+
+    # write to a temporary file first, so readers never see a partial file
+    tmp_fpath = fpath + ".tmp"
+    with open(tmp_fpath, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for key, array in arrays.items():
+            file.seek(descriptors[key]["offset"])
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+    os.replace(tmp_fpath, fpath)
+
+
+def load_header(fpath):
+    """
+    Load the header of a file saved with save_arrays.
+
+    :param fpath: The filepath to load the header from.
+    :return: The header dict, with "arrays" and "meta" entries.
+    """
+    with open(fpath, "rb") as file:
+        magic = file.read(len(MAGIC))
+        if magic != MAGIC:
+            raise Exception(
+                "{} is not an array store file, found magic bytes {}".format(
+                    fpath, magic
+                )
+            )
+        (header_len,) = struct.unpack("<Q", file.read(8))
+        return json.loads(file.read(header_len).decode())
+
+
+@functools.lru_cache(maxsize=128)
+def _load_arrays_cached(fpath, mtime):
+    header = load_header(fpath)
+    buffer = np.memmap(fpath, dtype=np.uint8, mode="r")
+    arrays = dict()
+    for key, descriptor in header["arrays"].items():
+        dtype = np.dtype(descriptor["dtype"])
+        shape = tuple(descriptor["shape"])
+        num_bytes = int(np.prod(shape)) * dtype.itemsize
+        start = descriptor["offset"]
+        arrays[key] = buffer[start : start + num_bytes].view(dtype).reshape(shape)
+    return arrays, header["meta"]
+
+
+def load_arrays(fpath):
+    """
+    Memory map all arrays of a file saved with save_arrays. The arrays are
+    read-only views, and the pages are only read from disk once accessed.
+    Recently loaded files are kept open, and reloaded if modified.
+
+    :param fpath: The filepath to load the arrays from.
+    :return: Tuple of the dict of str keys to read-only arrays, and the meta dict.
+    """
+    fpath = os.path.abspath(fpath)
+    return _load_arrays_cached(fpath, os.path.getmtime(fpath))
@@ -1,28 +1,225 @@
 # global
 import os
 import ivy
+import json
+import bisect
+import hashlib
+import threading
+import numpy as np
+import concurrent.futures
+
+# local
+from ivy_builder.array_store import save_arrays, load_arrays, load_header
+
+CHECKPOINT_FORMATS = {"hdf5": ".hdf5", "mmap": ".mmap", "incremental": ".shards"}
+
+
+def _to_numpy(x):
+    return x if isinstance(x, np.ndarray) else ivy.to_numpy(x)
+
+
+def _shard_key(key_chain, shard_depth):
+    return "/".join(key_chain.split("/")[:shard_depth])
+
+
+def _group_shards(arrays, shard_depth):
+    shards = dict()
+    for kc, x in arrays.items():
+        shards.setdefault(_shard_key(kc, shard_depth), list()).append((kc, x))
+    return shards
+
+
+def _hash_arrays(arrays):
+    sha = hashlib.sha1()
+    for kc in sorted(arrays.keys()):
+        array = np.ascontiguousarray(arrays[kc])
+        sha.update(kc.encode())
+        sha.update(array.dtype.str.encode())
+        sha.update(str(array.shape).encode())
+        sha.update(array.reshape(-1).view(np.uint8))
+    return sha.hexdigest()
+
+
+def _shards_dir(fpath):
+    return os.path.join(os.path.dirname(fpath), "shards")
+
+
+def _save_shards(shards, fpath):
+    # shards are content addressed, so those already on disk are not written again
+    shard_hashes = dict()
+    for shard_key, leaves in shards.items():
+        arrays = dict(leaves)
+        shard_hash = _hash_arrays(arrays)
+        shard_fpath = os.path.join(_shards_dir(fpath), shard_hash + ".mmap")
+        if not os.path.exists(shard_fpath):
+            os.makedirs(_shards_dir(fpath), exist_ok=True)
+            save_arrays(shard_fpath, arrays)
+        shard_hashes[shard_key] = shard_hash
+    save_arrays(fpath, dict(), meta={"shards": shard_hashes})
+    return shard_hashes
+
+
+def _load_shards(fpath):
+    leaves = dict()
+    for shard_hash in load_header(fpath)["meta"]["shards"].values():
+        arrays, _ = load_arrays(os.path.join(_shards_dir(fpath), shard_hash + ".mmap"))
+        leaves.update(arrays)
+    return leaves
+
+
+def save_checkpoint(checkpoint, fpath):
+    """
+    Save a checkpoint container to disk. Filepaths ending in .mmap are saved as an
+    array store, with a json header and aligned raw arrays which can be memory
+    mapped. Filepaths ending in .shards are saved as a manifest of content hashed
+    array store shards, one for each pair of top level keys, in a shards directory
+    next to the manifest. All other filepaths are saved as hdf5.
+
+    :param checkpoint: The container of arrays to save.
+    :param fpath: The filepath to save the checkpoint to.
+    """
+    if fpath.endswith(CHECKPOINT_FORMATS["incremental"]):
+        _save_shards(_group_shards(_host_arrays(checkpoint), 2), fpath)
+        return
+    _save_host_arrays(_host_arrays(checkpoint), fpath)
+
+
+def _host_arrays(checkpoint, copy=False):
+    # copies are needed if the arrays can be updated in place before being written
+    return dict(
+        [
+            (kc, np.array(_to_numpy(x)) if copy else _to_numpy(x))
+            for kc, x in checkpoint.cont_to_iterator()
+        ]
+    )
+
+
+def _save_hdf5(arrays, fpath):
+    import h5py
+
+    # intermediate groups are created from the key chains, as ivy containers expect
+    with h5py.File(fpath, "w") as h5_file:
+        for kc, array in arrays.items():
+            h5_file.create_dataset(kc, data=array)
+
+
+def _save_host_arrays(arrays, fpath):
+    # only numpy is used, so this can run on a writer thread while the training
+    # thread switches the ivy backend
+    if fpath.endswith(CHECKPOINT_FORMATS["mmap"]):
+        save_arrays(fpath, arrays)
+        return
+    # written under a temporary name first, so a checkpoint file is never partial
+    tmp_fpath = os.path.join(
+        os.path.dirname(fpath), "." + os.path.basename(fpath) + ".tmp"
+    )
+    if os.path.exists(tmp_fpath):
+        os.remove(tmp_fpath)
+    _save_hdf5(arrays, tmp_fpath)
+    os.replace(tmp_fpath, fpath)
+
+
+def _in_key_chains(key_chain, key_chains):
+    # a key chain is selected if it contains one of the key chains as a run of keys,
+    # so that nested optimizer state is selected along with its variables
+    padded = "/" + key_chain + "/"
+    return any(["/" + kc.strip("/") + "/" in padded for kc in key_chains])
 
 
 class Checkpoint:
-    def __init__(self, optimizer, net):
+    def __init__(self, optimizer, net, data_loader=None):
         self._optimizer = optimizer
         self._net = net
+        self._data_loader = data_loader
+
+    @staticmethod
+    def _restore_leaves(cont, leaves, prefix, dev_str, v_keychains=None):
+        # the leaves are moved to the device one at a time, replacing those in cont
+        cont = ivy.default(cont, ivy.Container())
+        for key_chain, x in leaves.items():
+            if not key_chain.startswith(prefix + "/"):
+                continue
+            key_chain = key_chain[len(prefix) + 1 :]
+            if ivy.exists(v_keychains) and not _in_key_chains(key_chain, v_keychains):
+                continue
+            cont.cont_set_at_key_chain(
+                key_chain, ivy.array(x, device=dev_str), inplace=True
+            )
+        return cont
 
     # noinspection PyProtectedMember
-    def restore(self, checkpoint_path):
-        checkpoint = ivy.Container.cont_from_disk_as_hdf5(checkpoint_path)
-        loaded_v = checkpoint.network.cont_map(
-            lambda x, kc: ivy.array(ivy.to_device(x, self._net._dev))
-        )
+    def restore(self, checkpoint_path, v_keychains=None):
+        """
+        restore the network variables, optimizer state and data loader state from a
+        checkpoint file. Memory mapped checkpoints are only read from disk as each
+        variable is moved to its device.
+
+        :param checkpoint_path: The hdf5, .mmap or .shards checkpoint file to restore
+                                from.
+        :param v_keychains: Key chains of the variables to restore, with the
+                            optimizer state containing them. Default is all.
+        """
+        if checkpoint_path.endswith(CHECKPOINT_FORMATS["mmap"]):
+            leaves, _ = load_arrays(checkpoint_path)
+        elif checkpoint_path.endswith(CHECKPOINT_FORMATS["incremental"]):
+            leaves = _load_shards(checkpoint_path)
+        else:
+            leaves = dict(
+                ivy.Container.cont_from_disk_as_hdf5(checkpoint_path).cont_to_iterator()
+            )
         if ivy.exists(self._net.v):
             # if build_mode is 'on_call', the network variables will not have been built yet
-            assert (self._net.v.cont_shapes == loaded_v.cont_shapes).cont_all_true()
-        self._net.v = loaded_v
+            loaded_shapes = dict(
+                [
+                    (kc[len("network/") :], tuple(x.shape))
+                    for kc, x in leaves.items()
+                    if kc.startswith("network/")
+                ]
+            )
+            for kc, x in self._net.v.cont_to_iterator():
+                if kc in loaded_shapes:
+                    assert tuple(x.shape) == loaded_shapes[kc]
+                else:
+                    assert ivy.exists(v_keychains)
+            self._net.v = self._restore_leaves(
+                self._net.v, leaves, "network", self._net._dev, v_keychains
+            )
+        else:
+            self._net.v = self._restore_leaves(
+                None, leaves, "network", self._net._dev, v_keychains
+            )
         self._optimizer.set_state(
-            checkpoint.optimizer.cont_map(
-                lambda x, kc: ivy.to_device(x, self._net.spec.dev_strs[0])
+            self._restore_leaves(
+                self._optimizer.state if ivy.exists(v_keychains) else None,
+                leaves,
+                "optimizer",
+                self._net.spec.dev_strs[0],
+                v_keychains,
             )
         )
+        data_loader_state = dict(
+            [
+                (
+                    kc[len("data_loader/") :],
+                    (ivy.to_numpy(x) if ivy.is_array(x) else np.asarray(x)).tolist(),
+                )
+                for kc, x in leaves.items()
+                if kc.startswith("data_loader/")
+            ]
+        )
+        if ivy.exists(self._data_loader) and data_loader_state:
+            # resume the data loader where it was, rather than replaying the data
+            self._data_loader.load_state_dict(data_loader_state)
+
+    def data_loader_state(self):
+        if not ivy.exists(self._data_loader):
+            return None
+        state = self._data_loader.state_dict()
+        if not ivy.exists(state):
+            return None
+        # unset values, such as a sampler seed of None, fall back to the spec on load
+        state = dict([(k, v) for k, v in state.items() if ivy.exists(v)])
+        return ivy.Container(state).cont_map(lambda x, kc: ivy.array(x))
 
     @property
     def optimizer(self):
@@ -32,36 +229,222 @@ class Checkpoint:
     def net(self):
         return self._net
 
+    @property
+    def data_loader(self):
+        return self._data_loader
+
+
+def _checkpoint_step(fname):
+    return int(fname.split("-")[-1].split(".")[0])
+
 
 class CheckpointManager:
-    def __init__(self, checkpoint, directory, max_to_keep=20, step_counter=0):
+    def __init__(
+        self,
+        checkpoint,
+        directory,
+        max_to_keep=20,
+        step_counter=0,
+        async_writes=False,
+        keep_every_n_steps=None,
+        keep_best=0,
+        best_mode="min",
+        checkpoint_format="hdf5",
+        shard_depth=2,
+    ):
+        """
+        saves checkpoints to a directory, and prunes them on a background thread.
+        A checkpoint is kept if it is one of the max_to_keep most recent, if its step
+        is a multiple of keep_every_n_steps, or if its metric is one of the keep_best
+        best. A max_to_keep of None keeps every checkpoint. The checkpoint_format is
+        either hdf5, mmap for memory mapped checkpoints which restore lazily, or
+        incremental. Incremental checkpoints are split into shards by the first
+        shard_depth keys of each key chain, and every shard is hashed by its content,
+        so only the shards which are not already on disk are written.
+        """
+        assert best_mode in ["min", "max"]
+        assert checkpoint_format in CHECKPOINT_FORMATS
         self._checkpoint = checkpoint
         self._directory = directory
         self._max_to_keep = max_to_keep
         self._step_counter = step_counter
+        self._async_writes = async_writes
+        self._keep_every_n_steps = keep_every_n_steps
+        self._keep_best = keep_best
+        self._best_mode = best_mode
+        self._checkpoint_ext = CHECKPOINT_FORMATS[checkpoint_format]
+        self._shard_depth = shard_depth
+        # a single thread for writing and pruning, so at most one checkpoint is
+        # written at a time, and the pruning never overlaps with the writes
+        self._pool = None
+        self._pending_write = None
+        self._pending_prune = None
+        # in-memory index of the checkpoints on disk, kept sorted by step
+        self._index_lock = threading.Lock()
+        self._steps = list()
+        self._fpaths = dict()
+        self._metrics = dict()
+        self._shard_refs = dict()
+        self._metrics_fpath = os.path.join(self._directory, "metrics.json")
         self._latest_checkpoint_fpath = None
-        self._get_latest_checkpoint_fpath()
+        self._load_index()
 
-    def _get_latest_checkpoint_fpath(self):
+    def _load_index(self):
         if not os.path.exists(self._directory):
             return
-        contents = os.listdir(self._directory)
-        if contents:
-            contents.sort(key=lambda x: int(x.split("-")[-1].split(".hdf5")[0]))
-            self._latest_checkpoint_fpath = os.path.join(self._directory, contents[-1])
+        # partially written temporary files are not checkpoints
+        for fname in os.listdir(self._directory):
+            if not fname.startswith(".") and fname.endswith(
+                tuple(CHECKPOINT_FORMATS.values())
+            ):
+                step = _checkpoint_step(fname)
+                self._fpaths[step] = os.path.join(self._directory, fname)
+                if fname.endswith(CHECKPOINT_FORMATS["incremental"]):
+                    self._shard_refs[step] = set(
+                        load_header(self._fpaths[step])["meta"]["shards"].values()
+                    )
+        self._steps = sorted(self._fpaths.keys())
+        if os.path.exists(self._metrics_fpath):
+            with open(self._metrics_fpath) as f:
+                metrics = {int(k): v for k, v in json.load(f).items()}
+            self._metrics = {k: v for k, v in metrics.items() if k in self._fpaths}
+        if self._steps:
+            self._latest_checkpoint_fpath = self._fpaths[self._steps[-1]]
+
+    def _add_to_index(self, step, fpath, metric):
+        with self._index_lock:
+            if step not in self._fpaths:
+                bisect.insort(self._steps, step)
+            self._fpaths[step] = fpath
+            if metric is not None:
+                self._metrics[step] = metric
+            self._latest_checkpoint_fpath = self._fpaths[self._steps[-1]]
+
+    def _steps_to_keep(self):
+        if self._max_to_keep is None:
+            return set(self._steps)
+        keep = set(self._steps[-self._max_to_keep :] if self._max_to_keep > 0 else [])
+        if self._keep_every_n_steps is not None:
+            keep |= {s for s in self._steps if s % self._keep_every_n_steps == 0}
+        if self._keep_best > 0:
+            ranked = sorted(
+                self._metrics.keys(),
+                key=lambda s: self._metrics[s],
+                reverse=self._best_mode == "max",
+            )
+            keep |= set(ranked[: self._keep_best])
+        # the latest checkpoint is always kept, for resuming
+        keep |= set(self._steps[-1:])
+        return keep
+
+    def _prune(self):
+        with self._index_lock:
+            keep = self._steps_to_keep()
+            removed_steps = [s for s in self._steps if s not in keep]
+            fpaths_to_remove = [self._fpaths.pop(s) for s in removed_steps]
+            self._steps = [s for s in self._steps if s in keep]
+            self._metrics = {k: v for k, v in self._metrics.items() if k in keep}
+            metrics = dict(self._metrics)
+            # shards are removed once no remaining checkpoint references them
+            removed_refs = set().union(
+                *[self._shard_refs.pop(s, set()) for s in removed_steps]
+            )
+            removed_refs -= set().union(*self._shard_refs.values())
+            fpaths_to_remove += [
+                os.path.join(self._directory, "shards", shard_hash + ".mmap")
+                for shard_hash in removed_refs
+            ]
+        for fpath in fpaths_to_remove:
+            try:
+                os.remove(fpath)
+            except FileNotFoundError:
+                pass
+        if metrics:
+            tmp_fpath = self._metrics_fpath + ".tmp"
+            with open(tmp_fpath, "w") as f:
+                json.dump({str(k): v for k, v in metrics.items()}, f)
+            os.replace(tmp_fpath, self._metrics_fpath)
+
+    def _write(self, arrays, fpath, step, metric=None):
+        _save_host_arrays(arrays, fpath)
+        self._add_to_index(step, fpath, metric)
+
+    def _write_incremental(self, shards, fpath, step, metric=None):
+        shard_hashes = _save_shards(shards, fpath)
+        with self._index_lock:
+            self._shard_refs[step] = set(shard_hashes.values())
+        self._add_to_index(step, fpath, metric)
+
+    def _submit(self, fn, *args):
+        if not ivy.exists(self._pool):
+            self._pool = concurrent.futures.ThreadPoolExecutor(1)
+        return self._pool.submit(fn, *args)
 
     @property
     def latest_checkpoint_fpath(self):
         return self._latest_checkpoint_fpath
 
-    def save(self, step):
+    @property
+    def checkpoint_fpaths(self):
+        with self._index_lock:
+            return [self._fpaths[s] for s in self._steps]
+
+    def save(self, step, metric=None):
+        """
+        save a checkpoint for the step, with an optional metric for keeping the best
+        """
         checkpoint = ivy.Container(
             {
                 "network": self._checkpoint.net.v,
                 "optimizer": self._checkpoint.optimizer.state,
             }
         )
-        self._latest_checkpoint_fpath = os.path.join(
-            self._directory, "chkpt-{}.hdf5".format(step)
+        data_loader_state = self._checkpoint.data_loader_state()
+        if ivy.exists(data_loader_state):
+            checkpoint.data_loader = data_loader_state
+        fpath = os.path.join(
+            self._directory, "chkpt-{}{}".format(step, self._checkpoint_ext)
         )
-        checkpoint.cont_to_disk_as_hdf5(self._latest_checkpoint_fpath)
+        metric = float(metric) if ivy.exists(metric) else None
+        self.wait()
+        if self._checkpoint_ext == CHECKPOINT_FORMATS["incremental"]:
+            # arrays updated in place keep their identity, and so every shard is
+            # hashed by the content of its host copy
+            shards = _group_shards(
+                _host_arrays(checkpoint, copy=self._async_writes), self._shard_depth
+            )
+            if self._async_writes:
+                self._pending_write = self._submit(
+                    self._write_incremental, shards, fpath, step, metric
+                )
+            else:
+                self._write_incremental(shards, fpath, step, metric)
+        elif self._async_writes:
+            # host copies, so training can continue to update the device arrays, and
+            # the writer thread does not call ivy while the backend may be switched
+            self._pending_write = self._submit(
+                self._write, _host_arrays(checkpoint, copy=True), fpath, step, metric
+            )
+        else:
+            self._write(_host_arrays(checkpoint), fpath, step, metric)
+        if ivy.exists(self._max_to_keep):
+            self._pending_prune = self._submit(self._prune)
+
+    def wait(self):
+        """
+        wait for the pending asynchronous write and pruning, raising any of their errors
+        """
+        pending = [self._pending_write, self._pending_prune]
+        self._pending_write = None
+        self._pending_prune = None
+        for future in pending:
+            if ivy.exists(future):
+                future.result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if ivy.exists(self._pool):
+                self._pool.shutdown()
+                self._pool = None
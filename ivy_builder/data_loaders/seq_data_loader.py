@@ -5,20 +5,42 @@ try:
     import cv2
 except ModuleNotFoundError:
     cv2 = None
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
 import ivy
 import math
 import json
 import logging
+import threading
 import collections
 import numpy as np
 import multiprocessing
-from ivy_builder.dataset import Dataset
+import concurrent.futures
+from ivy_builder.dataset import Cache, Dataset, DatasetExecutor
+from ivy_builder.sampler import SequentialSampler, RandomSampler, WeightedSampler
+from ivy_builder.array_store import load_arrays, load_header
 from ivy_builder.abstract.data_loader import DataLoader
 from ivy_builder.data_loaders.specs.seq_data_loader_spec import SeqDataLoaderSpec
 
 
 # noinspection PyUnresolvedReferences
 class SeqDataLoader(DataLoader):
+    # the stages which the latency worker allocation splits the workers across
+    _allocated_stages = [
+        "loaded_json",
+        "parsed_json",
+        "loaded_mmap",
+        "keychain_pruned",
+        "valid_first_frames",
+        "windowed",
+        "unbatched",
+        "sampled",
+        "shuffled",
+        "loaded_data",
+    ]
+
     def __init__(self, data_loader_spec: SeqDataLoaderSpec):
         super(SeqDataLoader, self).__init__(data_loader_spec)
 
@@ -39,6 +61,39 @@ class SeqDataLoader(DataLoader):
         self._container_data_dir = os.path.join(
             self._spec.dataset_spec.dirs.dataset_dir, "containers/"
         )
+        self._mmap_data_dir = os.path.join(
+            self._spec.dataset_spec.dirs.dataset_dir, "containers_mmap/"
+        )
+        self._img_shards_dir = os.path.join(
+            self._spec.dataset_spec.dirs.dataset_dir, "img_shards/"
+        )
+        if self._spec.img_mode == "shards":
+            self._img_shard_locations = self._load_img_shard_locations(
+                self._img_shards_dir
+            )
+
+        # decoded frames, shared by all overlapping windows and batches
+        if self._spec.frame_cache_size > 0:
+            self._frame_cache = Cache(
+                self._spec.frame_cache_size, self._spec.frame_cache_max_bytes
+            )
+        else:
+            self._frame_cache = None
+        self._num_frame_decodes = 0
+        self._frame_cache_lock = threading.Lock()
+
+        # thread pool for decoding, created lazily in each loading process
+        self._decode_pool = None
+        self._decode_pool_pid = None
+
+        # interned strings, filled by whichever process parses the containers
+        self._str_table = list()
+        self._str_ids = dict()
+        self._interned_key_chains = set()
+        self._mmap_str_ids = dict()
+
+        # key chain layout of the json containers, inferred in the parsing process
+        self._json_schema = None
         self._batch_size = self._spec.batch_size
         self._base_cache_size = (
             self._spec.cache_size * self._spec.batch_size * self._spec.window_size
@@ -87,20 +142,46 @@ class SeqDataLoader(DataLoader):
 
         # compute num workers for each component
         self._compute_num_workers()
+        self._process_prefetching = (
+            self._spec.with_prefetching and self._spec.prefetch_backend == "process"
+        )
 
         # custom init
         self._custom_init_fn = self._spec.custom_init_fn
         if ivy.exists(self._custom_init_fn):
             self._custom_init_fn(self)
 
+        # every loaded data worker must shuffle with the same seed, drawn once here
+        if ivy.exists(self._spec.shuffle_seed):
+            self._shuffle_seed = self._spec.shuffle_seed
+        elif self._spec.shuffle_buffer_size > 0:
+            self._shuffle_seed = int(np.random.randint(2**31))
+        else:
+            self._shuffle_seed = None
+
+        # sampler and sequence order, created along with the dataset
+        self._sampler = None
+        self._seq_order = None
+        self._restored_seq_order = None
+
+        # split the workers across the stages by their latencies, measured while the
+        # first batches are loaded with every stage in this process
+        self._stage_latencies = None
+        self._stage_times = list()
+        self._measuring_latencies = self._spec.worker_allocation == "latency"
+        if self._measuring_latencies:
+            for name in self._allocated_stages:
+                self._num_workers[name] = 1
+
         # dataset
-        self._dataset = self._get_dataset(start_idx, end_idx)
-        self._iterator = iter(self._dataset)
+        self._start_idx = start_idx
+        self._end_idx = end_idx
+        self._init_dataset()
 
         # dummy batch
         self._first_batch = None
 
-        # counter
+        # counter, the index of the next batch
         self._counter = 0
 
     # Built-Ins #
@@ -140,6 +221,35 @@ class SeqDataLoader(DataLoader):
             return ivy.array(x, dtype="uint8")
         return ivy.array(x, dtype="float32")
 
+    def _intern_str(self, string):
+        if string not in self._str_ids:
+            self._str_ids[string] = len(self._str_table)
+            self._str_table.append(string)
+        return self._str_ids[string]
+
+    def _leaf_to_tensor(self, x, key_chain=""):
+        if self._spec.intern_paths and isinstance(x, str):
+            self._interned_key_chains.add(key_chain)
+            return ivy.array([[self._intern_str(x)]], dtype="int32")
+        return self._to_tensor(x, key_chain)
+
+    def _path_str(self, filepath):
+        if self._spec.intern_paths:
+            return self._str_table[int(ivy.to_numpy(filepath))]
+        return bytearray(ivy.to_numpy(filepath).tolist()).decode()
+
+    def _uninterned(self, ids):
+        # strings which are not loaded are returned as uint8 arrays, as without
+        # interning, zero padded to the length of the longest string
+        strs = [
+            self._str_table[i].encode() for i in ivy.to_numpy(ids).reshape(-1).tolist()
+        ]
+        max_len = max([len(string) for string in strs], default=0)
+        array = np.zeros((len(strs), max_len), np.uint8)
+        for i, string in enumerate(strs):
+            array[i, : len(string)] = np.frombuffer(string, np.uint8)
+        return ivy.array(array.reshape(tuple(ids.shape) + (max_len,)))
+
     @staticmethod
     def _load_container_filepaths_as_lists(cont_dir, starting_example, ending_example):
         if not os.path.isdir(cont_dir):
@@ -196,7 +306,7 @@ class SeqDataLoader(DataLoader):
                     break
                 with open(filepath) as fp:
                     container_dict = json.load(fp)
-                container = ivy.Container(container_dict).cont_map(self._to_tensor)
+                container = ivy.Container(container_dict).cont_map(self._leaf_to_tensor)
                 window_containers.append(container)
             window_containers += [container] * (
                 max_seq_len - seq_len - 1
@@ -216,7 +326,10 @@ class SeqDataLoader(DataLoader):
         self._num_workers = ivy.Container()
 
         # prefetch
-        self._num_workers.prefetch = int(self._spec.with_prefetching) + 1
+        if self._spec.prefetch_backend == "thread":
+            self._num_workers.prefetch = 1
+        else:
+            self._num_workers.prefetch = int(self._spec.with_prefetching) + 1
         num_workers = math.ceil(num_workers / self._num_workers.prefetch)
 
         # post processed
@@ -231,7 +344,13 @@ class SeqDataLoader(DataLoader):
         # loaded data
         self._num_workers.loaded_data = min(num_workers, self._batch_size)
 
-        # ToDo: add multi-processing support for these lower level datasets
+        # the stages below loaded data run inside each of its worker processes, in
+        # parallel across them, and the json stages are also given the workers left
+        # over by loaded data, of which there are at most batch size
+        json_workers = num_workers // self._num_workers.loaded_data - 1
+
+        # sampled
+        self._num_workers.sampled = 1
 
         # shuffled
         self._num_workers.shuffled = 1
@@ -254,6 +373,93 @@ class SeqDataLoader(DataLoader):
         # loaded json
         self._num_workers.loaded_json = 1
 
+        # strings are interned by the parsing process and resolved by the loaded data
+        # process, which must therefore be the same process
+        if self._spec.container_load_mode == "dynamic" and json_workers > 1:
+            if not self._spec.intern_paths and json_workers > 3:
+                self._num_workers.parsed_json = json_workers // 2
+                json_workers -= json_workers // 2
+            self._num_workers.loaded_json = json_workers
+
+        # loaded mmap
+        self._num_workers.loaded_mmap = 1
+
+    @staticmethod
+    def _num_stage_processes(num_workers):
+        upstream = sum(
+            [n for name, n in num_workers.items() if name != "loaded_data" and n > 1]
+        )
+        loaded_data = num_workers.get("loaded_data", 1)
+        if loaded_data > 1:
+            # every loaded data worker holds its own copy of the upstream stages
+            return loaded_data * (1 + upstream)
+        return max(upstream, 1)
+
+    def _measure_stage_latencies(self):
+        # the first batch includes the one-off costs of each stage, and so the
+        # latencies are those of the second batch
+        stats = self._dataset.stats()
+        self._stage_times.append(
+            dict(
+                [
+                    (n, stats[n].trans_time if n in stats else 0.0)
+                    for n in self._allocated_stages
+                ]
+            )
+        )
+        if len(self._stage_times) < 2:
+            return
+        warmup_times, stage_times = self._stage_times
+        self._allocate_workers_by_latency(
+            dict([(n, t - warmup_times[n]) for n, t in stage_times.items()])
+        )
+        self._measuring_latencies = False
+        # the rebuilt pipeline continues from the next batch, in the same order
+        self._restored_seq_order = self._seq_order
+        self._reset_dataset()
+
+    def _allocate_workers_by_latency(self, latencies):
+        """
+        splits the workers across the stages by the latencies measured while loading
+        the first two batches, with every stage running in this process.
+        """
+        stage_names = self._allocated_stages
+        num_workers = math.ceil(self._total_num_workers / self._num_workers.prefetch)
+
+        # strings are interned by the parsing process and resolved by the loaded data
+        # process, so every stage from parsing to loaded data must share the process
+        max_workers = dict([(name, num_workers) for name in stage_names])
+        max_workers["loaded_data"] = min(num_workers, self._batch_size)
+        if self._spec.intern_paths:
+            for name in stage_names[1:-1]:
+                max_workers[name] = 1
+
+        # repeatedly give one more worker to the slowest stage which fits the budget
+        allocation = dict([(name, 1) for name in stage_names])
+        while True:
+            candidates = [
+                name
+                for name in stage_names
+                if latencies[name] > 0 and allocation[name] < max_workers[name]
+            ]
+            candidates.sort(key=lambda n: latencies[n] / allocation[n], reverse=True)
+            for name in candidates:
+                trial = dict(allocation)
+                trial[name] += 1
+                if self._num_stage_processes(trial) <= num_workers:
+                    allocation = trial
+                    break
+            else:
+                break
+        for name, n in allocation.items():
+            self._num_workers[name] = n
+        self._stage_latencies = latencies
+        logging.info(
+            "allocated {} workers by stage latency {} as {}".format(
+                num_workers, latencies, allocation
+            )
+        )
+
     # Dynamic Windowing #
     # ------------------#
 
@@ -267,69 +473,41 @@ class SeqDataLoader(DataLoader):
         seq_info.length = ivy.ones_like(seq_info.length) * new_len
         return seq_info
 
+    def _window_gather_table(self, seq_len):
+        # index table of shape [num_windows, window_size], shared by all sequences
+        # of the same length
+        if seq_len not in self._window_gather_tables:
+            num_windows = max(seq_len, self._window_size) - self._window_size + 1
+            self._window_gather_tables[seq_len] = (
+                np.arange(num_windows)[:, None] + self._window_offsets
+            )
+        return self._window_gather_tables[seq_len]
+
     def _group_tensor_into_windowed_tensor_simple(self, x, seq_info):
         update_seq_length = seq_info.length is x
         seq_info = self._update_seq_info_for_window(seq_info)
         if self._fixed_sequence_length:
-            return ivy.reshape(
-                ivy.gather_nd(x, ivy.array(self._gather_idxs)),
-                (self._windows_per_seq, self._window_size) + x.shape[1:],
-            )
+            seq_len = self._sequence_lengths[0]
         else:
             if update_seq_length:
                 if int(seq_info.length[0]) < self._window_size:
                     ivy.inplace_update(x, seq_info.length * 0 + self._window_size)
             seq_len = int(seq_info.length[0])
-            num_windows_in_seq = math.ceil(seq_len / self._window_size)
-            window_idxs_in_seq = ivy.arange(0, num_windows_in_seq, 1)
-            gather_idxs = ivy.tile(
-                ivy.reshape(
-                    ivy.arange(0, self._window_size, 1), (1, self._window_size)
-                ),
-                (num_windows_in_seq, 1),
-            ) + ivy.expand_dims(window_idxs_in_seq, axis=-1)
-            gather_idxs_flat = ivy.reshape(
-                gather_idxs, (self._window_size * num_windows_in_seq, 1)
-            )
-            return ivy.reshape(
-                ivy.gather_nd(x, gather_idxs_flat),
-                (num_windows_in_seq, self._window_size) + x.shape[1:],
-            )
+        return ivy.gather(x, ivy.array(self._window_gather_table(seq_len)), axis=0)
 
     def _group_tensor_into_windowed_tensor(self, x, valid_first_frame):
         if self._window_size == 1:
-            valid_first_frame_pruned = ivy.astype(valid_first_frame[:, 0], "bool")
+            valid_first_frame_pruned = valid_first_frame[:, 0]
         else:
-            valid_first_frame_pruned = ivy.astype(
-                valid_first_frame[: 1 - self._window_size, 0], "bool"
-            )
-        if ivy.sum(ivy.astype(valid_first_frame_pruned, "int32"))[0] == 0:
-            valid_first_frame_pruned = ivy.astype(
-                ivy.one_hot(0, self._sequence_lengths[0] - self._window_size + 1),
-                "bool",
-            )
-        window_idxs_single = ivy.indices_where(valid_first_frame_pruned)
-
-        gather_idxs_list = list()
-        for w_idx in window_idxs_single:
-            gather_idxs_list.append(
-                ivy.expand_dims(
-                    ivy.arange(w_idx[0] + self._window_size, w_idx[0], 1), axis=0
-                )
+            valid_first_frame_pruned = valid_first_frame[: 1 - self._window_size, 0]
+        valid_first_frame_pruned = ivy.to_numpy(valid_first_frame_pruned).astype(bool)
+        if not valid_first_frame_pruned.any():
+            valid_first_frame_pruned = (
+                np.arange(self._sequence_lengths[0] - self._window_size + 1) == 0
             )
-        gather_idxs = ivy.concat(gather_idxs_list, axis=0)
-        gather_idxs = ivy.reshape(gather_idxs, (-1, 1))
-        num_valid_windows_for_seq = ivy.shape(window_idxs_single)[0:1]
-        return ivy.reshape(
-            ivy.gather_nd(x, gather_idxs),
-            ivy.concat(
-                (
-                    num_valid_windows_for_seq,
-                    ivy.array([self._window_size]),
-                    ivy.shape(x)[1:],
-                ),
-                axis=0,
-            ),
+        window_starts = np.nonzero(valid_first_frame_pruned)[0]
+        return ivy.gather(
+            x, ivy.array(window_starts[:, None] + self._window_offsets), axis=0
         )
 
     def _group_container_into_windowed_container(self, container):
@@ -371,15 +549,108 @@ class SeqDataLoader(DataLoader):
             len([item for item in containers.json_str if item != ""]) - 1
         )
         json_container_stack = [
-            ivy.Container(json.loads(json_str)).cont_map(self._to_tensor)[0]
+            ivy.Container(json.loads(json_str)).cont_map(self._leaf_to_tensor)[0]
             if json_str != ""
             else ivy.Container(
                 json.loads(json_strings_stack[highest_idx_entry])
-            ).cont_map(self._to_tensor)[0]
+            ).cont_map(self._leaf_to_tensor)[0]
             for json_str in json_strings_stack
         ]
         return ivy.Container.static_concat(json_container_stack, axis=0)
 
+    @staticmethod
+    def _json_loads(json_str):
+        if ivy.exists(orjson):
+            return orjson.loads(json_str)
+        return json.loads(json_str)
+
+    def _infer_json_schema(self, json_dict, key_path=()):
+        schema = list()
+        for key, value in json_dict.items():
+            if isinstance(value, dict):
+                sub_schema = self._infer_json_schema(value, key_path + (key,))
+                # empty dicts are kept, as they are by ivy.Container
+                schema += sub_schema if sub_schema else [(key_path + (key,), None)]
+            elif isinstance(value, str):
+                if self._spec.intern_paths:
+                    self._interned_key_chains.add("/".join(key_path + (key,)))
+                    schema.append((key_path + (key,), ((), "int32")))
+                else:
+                    schema.append(
+                        (key_path + (key,), ((len(value.encode()),), "uint8"))
+                    )
+            else:
+                schema.append((key_path + (key,), (np.shape(value)[1:], "float32")))
+        return schema
+
+    def _parse_json_strings_w_schema(self, containers):
+        json_dicts = [
+            self._json_loads(json_str) for json_str in containers.json_str if json_str
+        ]
+        if not ivy.exists(self._json_schema):
+            self._json_schema = self._infer_json_schema(json_dicts[0])
+        num_frames = len(containers.json_str)
+        container_dict = dict()
+        try:
+            for key_path, leaf_schema in self._json_schema:
+                if leaf_schema is None:
+                    array = dict()
+                else:
+                    shape, dtype = leaf_schema
+                    array = np.empty((num_frames,) + shape, dtype)
+                    for i, json_dict in enumerate(json_dicts):
+                        value = json_dict
+                        for key in key_path:
+                            value = value[key]
+                        if dtype == "int32":
+                            array[i] = self._intern_str(value)
+                        elif dtype == "uint8":
+                            array[i] = np.frombuffer(value.encode(), np.uint8)
+                        else:
+                            array[i] = value[0]
+                    # padded frames repeat the last valid frame
+                    array[len(json_dicts) :] = array[len(json_dicts) - 1]
+                    if dtype == "float32":
+                        # the frames are concatenated rather than stacked
+                        array = array.reshape((-1,) + shape[1:])
+                    array = ivy.array(array)
+                sub_dict = container_dict
+                for key in key_path[:-1]:
+                    sub_dict = sub_dict.setdefault(key, dict())
+                sub_dict[key_path[-1]] = array
+        except (KeyError, IndexError, TypeError, ValueError):
+            # a container which does not match the schema is parsed generically
+            return self._parse_json_strings(containers)
+        return ivy.Container(container_dict)
+
+    # compiled sequences to container
+
+    def _load_mmap_sequence(self, containers):
+        idxs = containers.idxs
+        win_idxs = [win_idx for seq_idx, win_idx in idxs if seq_idx is not None]
+        seq_idx = idxs[0][0]
+        # pad with the last valid frame, as done when parsing the json strings
+        win_idxs += [win_idxs[-1]] * (len(idxs) - len(win_idxs))
+        fpath = os.path.join(
+            self._mmap_data_dir, self._spec.mmap_fname_template % seq_idx
+        )
+        arrays, _ = load_arrays(fpath)
+        container = ivy.Container()
+        for key_chain, array in arrays.items():
+            if self._spec.intern_paths and array.dtype == np.uint8:
+                # strings are interned once per compiled sequence
+                if (fpath, key_chain) not in self._mmap_str_ids:
+                    self._mmap_str_ids[(fpath, key_chain)] = np.array(
+                        [self._intern_str(bytes(row).decode()) for row in array],
+                        dtype=np.int32,
+                    )
+                array = self._mmap_str_ids[(fpath, key_chain)]
+                self._interned_key_chains.add(key_chain)
+            container = container.cont_set_at_key_chain(
+                key_chain, ivy.array(array[win_idxs])
+            )
+        return container
+
     # container pruning
 
     def _prune_unused_key_chains(self, container):
@@ -391,7 +662,7 @@ class SeqDataLoader(DataLoader):
     def _array_fn(self, filepaths_in_window):
         conts = list()
         for filepath in filepaths_in_window:
-            str_path = bytearray(ivy.to_numpy(filepath).tolist()).decode()
+            str_path = self._path_str(filepath)
             full_path = os.path.abspath(
                 os.path.join(self._container_data_dir, str_path)
             )
@@ -409,19 +680,103 @@ class SeqDataLoader(DataLoader):
 
     # images
 
-    def _uint8_img_fn(self, filepaths_in_window):
-        imgs = list()
-        for filepath in filepaths_in_window:
-            str_path = bytearray(ivy.to_numpy(filepath).tolist()).decode()
-            full_path = os.path.abspath(
-                os.path.join(self._container_data_dir, str_path)
+    def _imread(self, full_path):
+        with self._frame_cache_lock:
+            if ivy.exists(self._frame_cache) and full_path in self._frame_cache:
+                return self._frame_cache[full_path]
+        img = cv2.imread(full_path, -1)
+        with self._frame_cache_lock:
+            self._num_frame_decodes += 1
+            if ivy.exists(self._frame_cache):
+                # the cached frame is returned for later windows, so must not be
+                # modified
+                img.flags.writeable = False
+                self._frame_cache.record_misses()
+                self._frame_cache[full_path] = img
+        return img
+
+    def _img_full_paths(self, filepaths_in_window, fn_name):
+        if not ivy.exists(cv2):
+            raise Exception(
+                "in order to use {}, opencv for python must be installed."
+                "To install opencv, run pip install opencv-python.".format(fn_name)
             )
-            if not ivy.exists(cv2):
+        return [
+            os.path.abspath(
+                os.path.join(
+                    self._container_data_dir,
+                    self._path_str(filepath),
+                )
+            )
+            for filepath in filepaths_in_window
+        ]
+
+    def _map_frames(self, fn, num_frames):
+        # cv2.imread releases the GIL, so the frames can be decoded concurrently
+        if self._spec.decode_threads == 0 or num_frames == 1:
+            return [fn(i) for i in range(num_frames)]
+        if self._decode_pool_pid != os.getpid():
+            self._decode_pool = concurrent.futures.ThreadPoolExecutor(
+                self._spec.decode_threads
+            )
+            self._decode_pool_pid = os.getpid()
+        return list(self._decode_pool.map(fn, range(num_frames)))
+
+    @staticmethod
+    def _load_img_shard_locations(shards_dir):
+        if not os.path.isdir(shards_dir):
+            raise Exception("image shards dir " + shards_dir + " does not exist")
+        locations = dict()
+        for shard_fname in sorted(os.listdir(shards_dir)):
+            shard_fpath = os.path.join(shards_dir, shard_fname)
+            header = load_header(shard_fpath)
+            for key_chain, str_paths in header["meta"]["paths"].items():
+                for row, str_path in enumerate(str_paths):
+                    locations[str_path] = (shard_fpath, key_chain, row)
+        return locations
+
+    def _load_imgs_from_shards(self, filepaths_in_window):
+        locations = list()
+        for filepath in filepaths_in_window:
+            str_path = self._path_str(filepath)
+            if str_path not in self._img_shard_locations:
                 raise Exception(
-                    "in order to use _uint8_img_fn, opencv for python must be installed."
-                    "To install opencv, run pip install opencv-python."
+                    "image {} was not found in the image shards in {}, "
+                    "re-run scripts/pack_dataset_images.py".format(
+                        str_path, self._img_shards_dir
+                    )
                 )
-            img_rgb = cv2.imread(full_path, -1)
+            locations.append(self._img_shard_locations[str_path])
+        shard_fpath, key_chain, row = locations[0]
+        rows = [loc[2] for loc in locations]
+        # consecutive frames of one shard are returned as a view without copying
+        if all(
+            [loc[0:2] == (shard_fpath, key_chain) for loc in locations]
+        ) and rows == list(range(row, row + len(rows))):
+            return load_arrays(shard_fpath)[0][key_chain][row : row + len(rows)]
+        return np.stack(
+            [load_arrays(loc[0])[0][loc[1]][loc[2]] for loc in locations], axis=0
+        )
+
+    def _uint8_img_fn(self, filepaths_in_window):
+        if self._spec.img_mode == "shards":
+            imgs_rgb = self._load_imgs_from_shards(filepaths_in_window)
+            if len(imgs_rgb.shape) == 3:
+                if not self._spec.load_gray_as_rgb:
+                    raise Exception(
+                        "Found images with shape {}, but load_gray_as_rgb is set to "
+                        "False. Set this to True in order to tile grayscale images to "
+                        "RGB.".format(imgs_rgb.shape)
+                    )
+                imgs_rgb = np.tile(np.expand_dims(imgs_rgb, -1), (1, 1, 1, 3))
+            return ivy.array(imgs_rgb.astype(np.float32)) / 255
+        full_paths = self._img_full_paths(filepaths_in_window, "_uint8_img_fn")
+        img0 = self._imread(full_paths[0])
+        img_shape = img0.shape if len(img0.shape) == 3 else img0.shape + (3,)
+        imgs = np.empty((len(full_paths),) + img_shape, np.float32)
+
+        def load_img(i):
+            img_rgb = img0 if i == 0 else self._imread(full_paths[i])
             if len(img_rgb.shape) == 2:
                 if not self._spec.load_gray_as_rgb:
                     raise Exception(
@@ -430,47 +785,37 @@ class SeqDataLoader(DataLoader):
                             img_rgb.shape
                         )
                     )
-                img_rgb = np.tile(np.expand_dims(img_rgb, -1), (1, 1, 3))
-            img = ivy.array(np.expand_dims(img_rgb.astype(np.float32), 0)) / 255
-            imgs.append(img)
-        return ivy.concat(imgs, axis=0)
+                img_rgb = np.expand_dims(img_rgb, -1)
+            # written straight into the preallocated batch, tiling grayscale to RGB
+            np.divide(img_rgb, np.float32(255), out=imgs[i])
+
+        self._map_frames(load_img, len(full_paths))
+        return ivy.array(imgs)
 
     def _float_img_fn(self, filepaths_in_window):
-        imgs = list()
-        for filepath in filepaths_in_window:
-            str_path = bytearray(ivy.to_numpy(filepath).tolist()).decode()
-            full_path = os.path.abspath(
-                os.path.join(self._container_data_dir, str_path)
-            )
-            if not ivy.exists(cv2):
-                raise Exception(
-                    "in order to use _float_img_fn, opencv for python must be installed."
-                    "To install opencv, run pip install opencv-python."
-                )
-            img_rgba = cv2.imread(full_path, -1)
-            img = ivy.array(
-                np.frombuffer(img_rgba.tobytes(), np.float32).reshape(
-                    (1,) + img_rgba.shape[:-1]
-                )
+        if self._spec.img_mode == "shards":
+            imgs_rgba = self._load_imgs_from_shards(filepaths_in_window)
+            return ivy.array(imgs_rgba.view(np.float32).reshape(imgs_rgba.shape[:-1]))
+        full_paths = self._img_full_paths(filepaths_in_window, "_float_img_fn")
+        img0 = self._imread(full_paths[0])
+        imgs = np.empty((len(full_paths),) + img0.shape[:-1], np.float32)
+
+        def load_img(i):
+            img_rgba = img0 if i == 0 else self._imread(full_paths[i])
+            imgs[i] = (
+                np.ascontiguousarray(img_rgba)
+                .view(np.float32)
+                .reshape(img_rgba.shape[:-1])
             )
-            imgs.append(img)
-        return ivy.concat(imgs, axis=0)
+
+        self._map_frames(load_img, len(full_paths))
+        return ivy.array(imgs)
 
     def _custom_img_fn(self, filepaths_in_window, fn):
-        imgs = list()
-        for filepath in filepaths_in_window:
-            str_path = bytearray(ivy.to_numpy(filepath).tolist()).decode()
-            full_path = os.path.abspath(
-                os.path.join(self._container_data_dir, str_path)
-            )
-            if not ivy.exists(cv2):
-                raise Exception(
-                    "in order to use _custom_img_fn, opencv for python must be installed."
-                    "To install opencv, run pip install opencv-python."
-                )
-            img_raw = cv2.imread(full_path, -1)
-            img = fn(img_raw)
-            imgs.append(img)
+        full_paths = self._img_full_paths(filepaths_in_window, "_custom_img_fn")
+        imgs = self._map_frames(
+            lambda i: fn(self._imread(full_paths[i])), len(full_paths)
+        )
         img0 = imgs[0]
         if isinstance(img0, ivy.Container):
             return ivy.Container.static_concat(imgs, axis=0)
@@ -482,28 +827,70 @@ class SeqDataLoader(DataLoader):
                 "but found {} or type {}".format(img0, type(img0))
             )
 
-    def _str_fn(self, x, key_chain=""):
-        for array_str in self._spec.array_strs:
-            if array_str in key_chain:
-                return self._array_fn(x)
+    def _img_fn(self, key_chain):
         for float_str in self._spec.float_strs:
             if float_str in key_chain:
-                return self._float_img_fn(x)
+                return self._float_img_fn
         for uint8_str in self._spec.uint8_strs:
             if uint8_str in key_chain:
-                return self._uint8_img_fn(x)
+                return self._uint8_img_fn
+        return None
+
+    def _str_fn(self, x, key_chain=""):
+        for array_str in self._spec.array_strs:
+            if array_str in key_chain:
+                return self._array_fn(x)
+        img_fn = self._img_fn(key_chain)
+        if ivy.exists(img_fn):
+            return img_fn(x)
         for i, custom_img_strs in enumerate(self._spec.custom_img_strs):
             for custom_img_str in custom_img_strs:
                 if custom_img_str in key_chain:
                     return self._custom_img_fn(x, self._spec.custom_img_fns[i])
+        if key_chain in self._interned_key_chains:
+            x = self._uninterned(x)
         for i, custom_strs in enumerate(self._spec.custom_strs):
             for custom_str in custom_strs:
                 if custom_str in key_chain:
                     return self._spec.custom_fns[i](x, self._container_data_dir)
         return x
 
+    def _load_windows(self, windows, key_chain=""):
+        img_fn = self._img_fn(key_chain)
+        if not isinstance(windows, list):
+            return self._str_fn(windows, key_chain)
+        if not ivy.exists(img_fn):
+            return [self._str_fn(window, key_chain) for window in windows]
+        # the frames of all windows are decoded in parallel into one preallocated
+        # array, which the windows are views of, and which is batched without copying
+        imgs = img_fn(ivy.concat(windows, axis=0))
+        starts = np.cumsum([0] + [window.shape[0] for window in windows]).tolist()
+        return [imgs[start:end] for start, end in zip(starts[:-1], starts[1:])]
+
     def _load_data_from_filepath_tensors(self, container):
-        return container.cont_map(self._str_fn)
+        return container.cont_map(self._load_windows)
+
+    # Sampling #
+    # ---------#
+
+    def _get_sampler(self, seq_lengths, windows_per_seq):
+        num_windows = sum(windows_per_seq)
+        # every epoch holds a whole number of batches
+        num_samples = max(num_windows // self._batch_size, 1) * self._batch_size
+        seed = self._spec.sampler_seed
+        if self._spec.sampler == "sequential":
+            return SequentialSampler(num_windows, num_samples, seed)
+        elif self._spec.sampler == "random":
+            return RandomSampler(num_windows, num_samples, seed)
+        # the weight of each sequence is shared by its windows, so that sequences
+        # are sampled in proportion to their weights, by default their lengths
+        seq_weights = np.asarray(
+            ivy.default(self._spec.sampler_weights, seq_lengths), dtype=np.float64
+        )
+        window_weights = np.repeat(
+            seq_weights / np.asarray(windows_per_seq), windows_per_seq
+        )
+        return WeightedSampler(window_weights, num_samples, seed)
 
     # Dataset Creation #
     # -----------------#
@@ -636,6 +1023,10 @@ class SeqDataLoader(DataLoader):
             def shuffle(self):
                 mapped_idxs = list(self._seq_idxs.values())
                 np.random.shuffle(mapped_idxs)
+                self.reorder(mapped_idxs)
+
+            def reorder(self, mapped_idxs):
+                assert sorted(mapped_idxs) == sorted(self._seq_idxs.values())
                 self._seq_idxs = collections.OrderedDict(
                     zip(self._seq_idxs.keys(), mapped_idxs)
                 )
@@ -693,6 +1084,20 @@ class SeqDataLoader(DataLoader):
             def sizes(self):
                 return self._pruned_sizes
 
+            @property
+            def seq_order(self):
+                return [int(seq_idx) for seq_idx in self._seq_idxs.values()]
+
+        # prefetching threads share the ivy backend with the trainer
+        thread_prefetching = (
+            self._spec.with_prefetching and not self._process_prefetching
+        ) or (
+            bool(self._spec.prefetch_to_devs)
+            and self._spec.num_device_buffers > 0
+            and not self._process_prefetching
+        )
+        numpy_loading = not thread_prefetching
+
         # container filepaths
         if self._spec.container_load_mode in ["preload", "dynamic"]:
             fpath_template = os.path.join(
@@ -711,9 +1116,12 @@ class SeqDataLoader(DataLoader):
         if self._spec.num_sequences != -1:
             container_idx_map = container_idx_map[0 : self._spec.num_sequences]
 
-        # shuffle sequences
-        if self._spec.preshuffle_data:
+        # shuffle sequences, samplers instead order the windows reproducibly
+        if ivy.exists(self._restored_seq_order):
+            container_idx_map.reorder(self._restored_seq_order)
+        elif self._spec.preshuffle_data and not ivy.exists(self._spec.sampler):
             container_idx_map.shuffle()
+        self._seq_order = container_idx_map.seq_order
 
         # extract sequence lengths
         if self._fixed_sequence_length:
@@ -724,36 +1132,16 @@ class SeqDataLoader(DataLoader):
                 )
             )
             self._windows_per_seq = self._sequence_lengths[0] - self._window_size + 1
-            # windowing values
-            window_idxs_per_seq = ivy.reshape(
-                ivy.arange(0, self._windows_per_seq, 1), (self._windows_per_seq, 1)
-            )
-            gather_idxs_list = list()
-            for x in window_idxs_per_seq:
-                if self._window_size == 1 and ivy.current_backend_str() != "tensorflow":
-                    if ivy.is_array(x):
-                        if x[0].shape == ():
-                            gather_idxs_list.append(
-                                ivy.expand_dims(
-                                    ivy.arange(
-                                        x[0].item(), x[0].item() + self._window_size, 1
-                                    ),
-                                    axis=0,
-                                )
-                            )
-                else:
-                    gather_idxs_list.append(
-                        ivy.expand_dims(
-                            ivy.arange(x[0], x[0] + self._window_size, 1), axis=0
-                        )
-                    )
-            gather_idxs = ivy.concat(gather_idxs_list, axis=0)
-            self._gather_idxs = ivy.to_numpy(
-                ivy.reshape(gather_idxs, (self._windows_per_seq * self._window_size, 1))
-            ).tolist()
         else:
             self._sequence_lengths = container_idx_map.sizes
 
+        # windowing gather tables, precomputed for the known sequence lengths
+        self._window_offsets = np.arange(self._window_size)
+        self._window_gather_tables = dict()
+        if isinstance(self._sequence_lengths, dict):
+            for seq_len in set(self._sequence_lengths.values()):
+                self._window_gather_table(seq_len)
+
         # maybe pre-load containers
         if self._spec.container_load_mode == "preload":
             # load containers with vector data and image filepath entries
@@ -777,8 +1165,9 @@ class SeqDataLoader(DataLoader):
                 ),
                 "base",
                 container_slices.cont_shape[0],
-                numpy_loading=True,
+                numpy_loading=numpy_loading,
                 cache_size=self._base_cache_size,
+                cache_max_bytes=self._spec.cache_max_bytes,
                 queue_timeout=self._spec.queue_timeout,
             )
         else:
@@ -792,8 +1181,9 @@ class SeqDataLoader(DataLoader):
                         lambda x_, kc: x_.to_filepaths()
                     ),
                     elementwise_query_fn=False,
-                    numpy_loading=True,
+                    numpy_loading=numpy_loading,
                     cache_size=self._base_cache_size,
+                    cache_max_bytes=self._spec.cache_max_bytes,
                     queue_timeout=self._spec.queue_timeout,
                 )
                 dataset = dataset.map(
@@ -801,9 +1191,29 @@ class SeqDataLoader(DataLoader):
                 )
                 dataset = dataset.map(
                     "parsed_json",
-                    self._parse_json_strings,
+                    self._parse_json_strings_w_schema
+                    if self._spec.json_schema_parsing
+                    else self._parse_json_strings,
                     self._num_workers.parsed_json,
                 )
+            elif self._spec.container_load_mode == "mmap":
+                # load windows straight from the compiled sequence files
+                dataset = Dataset(
+                    ivy.Container({"idxs": container_idx_map}),
+                    "base",
+                    len(container_idx_map),
+                    trans_fn=lambda cont: cont.cont_map(lambda x_, kc: x_.to_idxs()),
+                    elementwise_query_fn=False,
+                    numpy_loading=numpy_loading,
+                    cache_size=self._base_cache_size,
+                    cache_max_bytes=self._spec.cache_max_bytes,
+                    queue_timeout=self._spec.queue_timeout,
+                )
+                dataset = dataset.map(
+                    "loaded_mmap",
+                    self._load_mmap_sequence,
+                    self._num_workers.loaded_mmap,
+                )
             else:
                 dataset = Dataset(
                     ivy.Container({"idx_map": container_idx_map}),
@@ -813,8 +1223,9 @@ class SeqDataLoader(DataLoader):
                         self, cont
                     ),
                     elementwise_query_fn=False,
-                    numpy_loading=True,
+                    numpy_loading=numpy_loading,
                     cache_size=self._base_cache_size,
+                    cache_max_bytes=self._spec.cache_max_bytes,
                     queue_timeout=self._spec.queue_timeout,
                 )
             if "unused_key_chains" in self._spec:
@@ -839,23 +1250,42 @@ class SeqDataLoader(DataLoader):
                 self._group_container_into_windowed_container,
                 self._num_workers.windowed,
             )
+            seq_lengths = [
+                seq_len for seq_len in self._sequence_lengths.values() if seq_len > 0
+            ]
+            windows_per_seq = [
+                max(seq_len, self._window_size) - self._window_size + 1
+                for seq_len in seq_lengths
+            ]
             dataset = dataset.unbatch(
                 "unbatched",
                 self._num_workers.unbatched,
-                batch_sizes=[
-                    max(seq_len, self._window_size) - self._window_size + 1
-                    for seq_len in self._sequence_lengths.values()
-                    if seq_len > 0
-                ],
+                batch_sizes=windows_per_seq,
+            )
+        else:
+            seq_lengths = [1] * math.ceil(dataset.size)
+            windows_per_seq = seq_lengths
+        self._windows_per_epoch = sum(windows_per_seq)
+        if ivy.exists(self._spec.sampler):
+            self._sampler = self._get_sampler(seq_lengths, windows_per_seq)
+            dataset = dataset.sample(
+                "sampled", self._sampler, num_processes=self._num_workers.sampled
             )
         if self._spec.shuffle_buffer_size > 0:
+            # the sampled positions already span all epochs
             dataset = dataset.shuffle(
-                "shuffled", self._spec.shuffle_buffer_size, self._num_workers.shuffled
+                "shuffled",
+                self._spec.shuffle_buffer_size,
+                self._num_workers.shuffled,
+                seed=self._shuffle_seed,
+                num_epochs=1 if ivy.exists(self._spec.sampler) else 2**16,
             )
         dataset = dataset.map(
             "loaded_data",
             self._load_data_from_filepath_tensors,
             self._num_workers.loaded_data,
+            elementwise_query_fn=False,
+            transport=self._spec.transport,
         )
         dataset = dataset.batch("batched", self._batch_size, self._num_workers.batched)
         dataset = dataset.map(
@@ -870,32 +1300,168 @@ class SeqDataLoader(DataLoader):
                 self._spec.post_proc_fn,
                 self._num_workers.post_processed,
             )
-        if self._spec.with_prefetching:
-            dataset = dataset.prefetch("prefetch")
-        # ToDo: find way to make pre-fetching to GPU actually pre-fetch, ideally using multi-processing.
-        #  For example, swapping prefetch and to_gpu ops around would work if to_gpu could accept self._num_workers.
+        # the stage latencies are only recorded by stages running in this process
+        if self._spec.with_prefetching and not self._measuring_latencies:
+            dataset = dataset.prefetch(
+                "prefetch",
+                depth=self._spec.prefetch_depth,
+                backend=self._spec.prefetch_backend,
+            )
+        # with device buffers, the next batches are copied while the current one is used
         if self._spec.prefetch_to_devs:
             if isinstance(self._spec.prefetch_to_devs, str):
-                dataset = dataset.to_dev("to_dev", self._spec.prefetch_to_devs)
+                dataset = dataset.to_dev(
+                    "to_dev",
+                    self._spec.prefetch_to_devs,
+                    num_buffers=self._spec.num_device_buffers,
+                )
             elif len(self._spec.prefetch_to_devs) == 1:
-                dataset = dataset.to_dev("to_dev", self._spec.prefetch_to_devs[0])
+                dataset = dataset.to_dev(
+                    "to_dev",
+                    self._spec.prefetch_to_devs[0],
+                    num_buffers=self._spec.num_device_buffers,
+                )
             else:
-                dataset = dataset.to_devs("to_devs", self._spec.prefetch_to_devs)
+                dataset = dataset.to_devs(
+                    "to_devs",
+                    self._spec.prefetch_to_devs,
+                    num_buffers=self._spec.num_device_buffers,
+                )
         return dataset
 
+    def _init_dataset(self):
+        self._dataset = self._get_dataset(self._start_idx, self._end_idx)
+        if self._spec.shared_worker_pool and not self._measuring_latencies:
+            self._executor = DatasetExecutor(self._dataset, self._total_num_workers)
+        else:
+            self._executor = None
+
+    def _reset_dataset(self):
+        self.close()
+        self._init_dataset()
+        self._first_batch = None
+        self._stage_times = list()
+
     # Public Methods #
     # ---------------#
 
     def get_next_batch(self, dataset_key=None):
-        return next(self._iterator)
+        batch = self._dataset[self._counter]
+        self._counter += 1
+        if self._measuring_latencies:
+            self._measure_stage_latencies()
+        return batch
+
+    def set_epoch(self, epoch):
+        """
+        continue loading from the first batch of the given epoch. The batches of each
+        epoch only depend on the sampler seed and the epoch, and not on the number of
+        workers or on which batches were loaded before.
+        """
+        if not ivy.exists(self._sampler):
+            raise Exception(
+                "set_epoch is only valid for data loaders with a sampler, but the "
+                "sampler of the data loader spec is None."
+            )
+        counter = epoch * self.batches_per_epoch
+        if self._process_prefetching and counter != self._counter:
+            # the process prefetcher has already queued the batch after the last one
+            self._reset_dataset()
+        self._counter = counter
 
     def get_first_batch(self, dataset_key=None):
         if self._first_batch is None:
             self._first_batch = self._dataset[0]
         return self._first_batch
 
+    def stats(self):
+        return self._dataset.stats()
+
+    def state_dict(self):
+        state = {"counter": self._counter, "seq_order": self._seq_order}
+        if ivy.exists(self._sampler):
+            # the sampler order is fully determined by its seed and the epoch
+            state["epoch"] = self.epoch
+            state["sampler_seed"] = self._spec.sampler_seed
+        if ivy.exists(self._shuffle_seed):
+            # as is the shuffle order, the shuffle buffers only hold indices
+            state["epoch"] = self.epoch
+            state["shuffle_seed"] = self._shuffle_seed
+        return state
+
+    def load_state_dict(self, state):
+        sampler_seed = state.get("sampler_seed", self._spec.sampler_seed)
+        shuffle_seed = state.get("shuffle_seed", self._shuffle_seed)
+        # the process prefetcher has already queued the batch after the last one
+        rebuild = (
+            state["seq_order"] != self._seq_order
+            or sampler_seed != self._spec.sampler_seed
+            or shuffle_seed != self._shuffle_seed
+            or (self._process_prefetching and state["counter"] != self._counter)
+        )
+        if rebuild:
+            self._restored_seq_order = state["seq_order"]
+            self._spec.sampler_seed = sampler_seed
+            self._shuffle_seed = shuffle_seed
+            self._reset_dataset()
+        self._counter = state["counter"]
+
     def cycle_for_debugging(self, offset=0):
         self._dataset.cycle_for_debugging(offset)
 
+    def __getstate__(self):
+        # locks and thread pools cannot be pickled, as is needed for spawned processes
+        state = self.__dict__.copy()
+        state["_frame_cache_lock"] = None
+        state["_decode_pool"] = None
+        state["_decode_pool_pid"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._frame_cache_lock = threading.Lock()
+
     def close(self):
+        if ivy.exists(self._executor):
+            self._executor.close()
+        if ivy.exists(self._decode_pool) and self._decode_pool_pid == os.getpid():
+            self._decode_pool.shutdown()
+            self._decode_pool = None
+            self._decode_pool_pid = None
         self._dataset.close()
+
+    # Getters #
+    # --------#
+
+    @property
+    def epoch(self):
+        if ivy.exists(self._sampler):
+            return self._counter // self.batches_per_epoch
+        if ivy.exists(self._shuffle_seed):
+            # the shuffled positions of consecutive epochs follow one another
+            return self._counter * self._batch_size // self._windows_per_epoch
+        return None
+
+    @property
+    def batches_per_epoch(self):
+        if not ivy.exists(self._sampler):
+            return None
+        return len(self._sampler) // self._batch_size
+
+    @property
+    def sampler(self):
+        return self._sampler
+
+    @property
+    def num_frame_decodes(self):
+        return self._num_frame_decodes
+
+    @property
+    def stage_latencies(self):
+        return self._stage_latencies
+
+    @property
+    def frame_cache_stats(self):
+        if not ivy.exists(self._frame_cache):
+            return None
+        return self._frame_cache.stats
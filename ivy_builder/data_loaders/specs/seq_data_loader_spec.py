@@ -15,17 +15,29 @@ class SeqDataLoaderSpec(DataLoaderSpec):
         num_sequences,
         window_size=1,
         num_workers=1,
+        shared_worker_pool=False,
+        worker_allocation="fixed",
         cache_size=0,
+        cache_max_bytes=None,
         unused_key_chains=None,
         custom_init_fn=None,
         container_load_mode="dynamic",
+        mmap_fname_template="%06d.mmap",
         custom_container_load_fn=None,
         preshuffle_data=True,
         shuffle_buffer_size=0,
+        shuffle_seed=None,
+        sampler=None,
+        sampler_seed=0,
+        sampler_weights=None,
         with_prefetching=True,
+        prefetch_depth=1,
+        prefetch_backend="process",
         queue_timeout=None,
+        transport="queue",
         post_proc_fn=None,
         prefetch_to_devs="gpu:0",
+        num_device_buffers=0,
         single_pass=False,
         array_strs=None,
         float_strs=None,
@@ -35,6 +47,12 @@ class SeqDataLoaderSpec(DataLoaderSpec):
         custom_strs=None,
         custom_fns=None,
         array_mode="pickled",
+        img_mode="files",
+        frame_cache_size=0,
+        frame_cache_max_bytes=None,
+        decode_threads=0,
+        intern_paths=False,
+        json_schema_parsing=False,
         load_gray_as_rgb=True,
         containers_to_skip=None,
         **kwargs
@@ -55,7 +73,11 @@ class SeqDataLoaderSpec(DataLoaderSpec):
             if ivy.gpu_is_available() or isinstance(prefetch_to_devs, list)
             else False
         )
-        assert container_load_mode in ["preload", "dynamic", "custom"]
+        assert container_load_mode in ["preload", "dynamic", "mmap", "custom"]
+        assert prefetch_backend in ["process", "thread"]
+        assert img_mode in ["files", "shards"]
+        assert worker_allocation in ["fixed", "latency"]
+        assert sampler in [None, "sequential", "random", "weighted"]
         if container_load_mode == "custom":
             assert ivy.exists(custom_container_load_fn)
         else:
@@ -68,16 +90,28 @@ class SeqDataLoaderSpec(DataLoaderSpec):
             starting_idx=starting_idx,
             num_sequences=num_sequences,
             num_workers=num_workers,
+            shared_worker_pool=shared_worker_pool,
+            worker_allocation=worker_allocation,
             cache_size=cache_size,
+            cache_max_bytes=cache_max_bytes,
             unused_key_chains=unused_key_chains,
             custom_init_fn=custom_init_fn,
             container_load_mode=container_load_mode,
+            mmap_fname_template=mmap_fname_template,
             custom_container_load_fn=custom_container_load_fn,
             preshuffle_data=preshuffle_data,
             shuffle_buffer_size=shuffle_buffer_size,
+            shuffle_seed=shuffle_seed,
+            sampler=sampler,
+            sampler_seed=sampler_seed,
+            sampler_weights=sampler_weights,
             with_prefetching=with_prefetching,
+            prefetch_depth=prefetch_depth,
+            prefetch_backend=prefetch_backend,
+            transport=transport,
             post_proc_fn=post_proc_fn,
             prefetch_to_devs=prefetch_to_devs,
+            num_device_buffers=num_device_buffers,
             single_pass=single_pass,
             array_strs=array_strs,
             float_strs=float_strs,
@@ -87,6 +121,12 @@ class SeqDataLoaderSpec(DataLoaderSpec):
             custom_strs=custom_strs,
             custom_fns=custom_fns,
             array_mode=array_mode,
+            img_mode=img_mode,
+            frame_cache_size=frame_cache_size,
+            frame_cache_max_bytes=frame_cache_max_bytes,
+            decode_threads=decode_threads,
+            intern_paths=intern_paths,
+            json_schema_parsing=json_schema_parsing,
             load_gray_as_rgb=load_gray_as_rgb,
             containers_to_skip=containers_to_skip,
             **kwargs
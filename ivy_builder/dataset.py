@@ -2,10 +2,14 @@
 import ivy
 import sys
 import math
+import time
 import queue
 import logging
 import numbers
+import threading
+import weakref
 import traceback
+import collections
 import numpy as np
 
 
@@ -25,30 +29,322 @@ class EmptyDatasetException(Exception):
     pass
 
 
+def _nbytes(x):
+    if isinstance(x, _CacheEntry):
+        return x.num_bytes if ivy.exists(x.num_bytes) else _nbytes(x.item)
+    if isinstance(x, (list, tuple)):
+        return sum([_nbytes(v) for v in x])
+    if isinstance(x, ivy.Container):
+        return sum([_nbytes(v) for v in x.values()])
+    if isinstance(x, np.ndarray):
+        return x.nbytes
+    if ivy.is_array(x):
+        try:
+            return int(np.prod(x.shape)) * np.dtype(str(x.dtype)).itemsize
+        except TypeError:
+            return 0
+    return 0
+
+
+class _CacheEntry:
+    def __init__(self, item, idx=None, num_bytes=None):
+        # batched items are stored once, and only sliced when looked up
+        self.item = item
+        self.idx = idx
+        self.num_bytes = num_bytes
+
+    def resolve(self, num_elements=None):
+        if not ivy.exists(self.idx):
+            return self.item
+        if not ivy.exists(num_elements):
+            return Dataset._slice_dataset(self.idx, self.item)
+        return Dataset._slice_dataset(
+            slice(self.idx, self.idx + num_elements, 1), self.item
+        )
+
+
 # noinspection PyMissingConstructor
 class Cache:
-    def __init__(self, max_size):
+    def __init__(self, max_size, max_bytes=None):
         self._max_size = max_size
-        self._used_keys = list()
-        self._dict = dict()
+        self._max_bytes = max_bytes
+        self._dict = collections.OrderedDict()
+        self._sizes = dict()
+        self._num_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _evict_oldest(self):
+        key_to_del, _ = self._dict.popitem(last=False)
+        self._num_bytes -= self._sizes.pop(key_to_del)
+        self._evictions += 1
 
     def __setitem__(self, key, value):
-        if key in self:
-            self._used_keys.remove(key)
-            self._used_keys.append(key)
+        if key in self._dict:
+            self._dict.move_to_end(key)
+            return
+        num_bytes = _nbytes(value) if ivy.exists(self._max_bytes) else 0
+        if ivy.exists(self._max_bytes) and num_bytes > self._max_bytes:
             return
-        self._used_keys.append(key)
-        if len(self._used_keys) > self._max_size:
-            key_to_del = self._used_keys.pop(0)
-            del self._dict[key_to_del]
         self._dict[key] = value
+        self._sizes[key] = num_bytes
+        self._num_bytes += num_bytes
+        while len(self._dict) > self._max_size:
+            self._evict_oldest()
+        if ivy.exists(self._max_bytes):
+            while self._num_bytes > self._max_bytes:
+                self._evict_oldest()
 
     def __getitem__(self, item):
-        return self._dict[item]
+        value = self._dict[item]
+        self._dict.move_to_end(item)
+        self._hits += 1
+        return value
 
     def __contains__(self, key):
         return key in self._dict
 
+    def __len__(self):
+        return len(self._dict)
+
+    def record_misses(self, num_misses=1):
+        self._misses += num_misses
+
+    # Getters #
+    # --------#
+
+    @property
+    def num_bytes(self):
+        return self._num_bytes
+
+    @property
+    def stats(self):
+        return ivy.Container(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._dict),
+            num_bytes=self._num_bytes,
+        )
+
+
+class SharedMemoryArray(
+    collections.namedtuple("SharedMemoryArray", ["shape", "dtype", "offset"])
+):
+    pass
+
+
+class SharedMemoryRing:
+    def __init__(self, num_slots, slot_bytes, multiproc=None):
+        from multiprocessing import shared_memory
+
+        multiproc = ivy.default(multiproc, multiprocessing())
+        self._num_slots = num_slots
+        self._slot_bytes = slot_bytes
+        self._slots = [
+            shared_memory.SharedMemory(create=True, size=slot_bytes)
+            for _ in range(num_slots)
+        ]
+        self._free_slots = multiproc.Queue()
+        for i in range(num_slots):
+            self._free_slots.put(i)
+        self._collected = collections.deque()
+
+    # Worker #
+    # -------#
+
+    def write(self, item_dict, timeout):
+        try:
+            slot_idx = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        buf = self._slots[slot_idx].buf
+        offset = 0
+
+        def write_leaf(x):
+            nonlocal offset
+            if isinstance(x, list):
+                return [write_leaf(v) for v in x]
+            if isinstance(x, np.ndarray):
+                array = x
+            elif ivy.is_array(x):
+                array = ivy.to_numpy(x)
+            else:
+                return x
+            if array.dtype.hasobject:
+                return x
+            array = np.ascontiguousarray(array)
+            offset = int(math.ceil(offset / 64) * 64)
+            if offset + array.nbytes > self._slot_bytes:
+                raise BufferError
+            np.ndarray(array.shape, array.dtype, buffer=buf, offset=offset)[...] = array
+            ret = SharedMemoryArray(array.shape, array.dtype.str, offset)
+            offset += array.nbytes
+            return ret
+
+        try:
+            return slot_idx, _map_nested_dict(item_dict, write_leaf)
+        except BufferError:
+            self._free_slots.put(slot_idx)
+            return None
+
+    # Parent #
+    # -------#
+
+    def read(self, slot_idx, descriptor_dict, to_ivy=False):
+        """
+        returns read-only views of the arrays in the slot, without copying. The slot
+        is only given back to the worker once all of the views have been garbage
+        collected, which for a batched stage is once the batch has been stacked.
+        """
+        self.release_collected()
+        slot = np.frombuffer(self._slots[slot_idx].buf, np.uint8)
+        slot.flags.writeable = False
+        # the views all reference the base of the slot array, and not the array
+        weakref.finalize(slot.base, self._collected.append, slot_idx)
+        return _map_nested_dict(
+            descriptor_dict, lambda x: self._read_leaf(slot, x, to_ivy)
+        )
+
+    @staticmethod
+    def _read_leaf(slot, x, to_ivy):
+        # not a recursive closure, which would keep the slot alive in a cycle
+        if isinstance(x, list):
+            return [SharedMemoryRing._read_leaf(slot, v, to_ivy) for v in x]
+        if not isinstance(x, SharedMemoryArray):
+            return x
+        dtype = np.dtype(x.dtype)
+        nbytes = int(np.prod(x.shape)) * dtype.itemsize
+        view = slot[x.offset : x.offset + nbytes].view(dtype).reshape(x.shape)
+        return ivy.array(view) if to_ivy else view
+
+    def release_collected(self):
+        # slots are only put back here, rather than by the finalizer itself, as
+        # garbage collection can happen while the queue lock is held
+        while self._collected:
+            self._free_slots.put(self._collected.popleft())
+
+    def close(self, unlink=False):
+        for slot in self._slots:
+            try:
+                slot.close()
+            except BufferError:
+                # views of the slot are still referenced elsewhere
+                pass
+            if unlink:
+                try:
+                    slot.unlink()
+                except FileNotFoundError:
+                    pass
+        self._free_slots.cancel_join_thread()
+        self._free_slots.close()
+
+
+class ThreadPrefetcher:
+    def __init__(self, fetch_fn, depth=1, timeout=None):
+        """
+        keeps up to depth consecutive items ready in a bounded queue, which is filled
+        by a background thread while the caller is busy with the previous items.
+        """
+        self._fetch_fn = fetch_fn
+        self._depth = depth
+        self._timeout = timeout
+        self._queue = None
+        self._thread = None
+        self._stop_event = None
+        self._next_idx = None
+
+    def _fill_queue(self, idx, queue_in, stop_event):
+        while not stop_event.is_set():
+            try:
+                item, error = self._fetch_fn(idx), None
+            except Exception as e:
+                item, error = None, e
+            while not stop_event.is_set():
+                try:
+                    queue_in.put((item, error), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if ivy.exists(error):
+                return
+            idx += 1
+
+    def _start(self, idx):
+        self._queue = queue.Queue(maxsize=self._depth)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._fill_queue,
+            args=(idx, self._queue, self._stop_event),
+            daemon=True,
+        )
+        self._thread.start()
+        self._next_idx = idx
+
+    def get(self, idx):
+        # non-sequential queries restart the fill thread from the queried index
+        if not ivy.exists(self._thread) or idx != self._next_idx:
+            self.close()
+            self._start(idx)
+        item, error = self._queue.get(timeout=self._timeout)
+        if ivy.exists(error):
+            self.close()
+            raise error
+        self._next_idx = idx + 1
+        return item
+
+    def close(self):
+        if not ivy.exists(self._thread):
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._queue = None
+
+    # Getters #
+    # --------#
+
+    @property
+    def depth(self):
+        return self._depth
+
+
+def _map_nested_dict(dict_in, fn):
+    return {
+        k: _map_nested_dict(v, fn) if isinstance(v, dict) else fn(v)
+        for k, v in dict_in.items()
+    }
+
+
+def _stack_items(items):
+    # items which are consecutive rows of one writeable array, such as windows loaded
+    # into a preallocated array together, are stacked as a view without copying
+    arrays = [ivy.to_native(item) for item in items]
+    array0 = arrays[0]
+    if (
+        all(isinstance(a, np.ndarray) for a in arrays)
+        and ivy.exists(array0.base)
+        and array0.flags.c_contiguous
+        and array0.flags.writeable
+        and all(
+            a.base is array0.base
+            and a.shape == array0.shape
+            and a.dtype == array0.dtype
+            and a.flags.c_contiguous
+            and a.ctypes.data == array0.ctypes.data + i * array0.nbytes
+            for i, a in enumerate(arrays)
+        )
+    ):
+        return ivy.array(
+            np.lib.stride_tricks.as_strided(
+                array0,
+                (len(arrays),) + array0.shape,
+                (array0.nbytes,) + array0.strides,
+            )
+        )
+    return ivy.concat([ivy.expand_dims(item, axis=0) for item in items], axis=0)
+
 
 class Dataset:
     def __init__(
@@ -62,20 +358,33 @@ class Dataset:
         elementwise_query_fn=True,
         with_caching=True,
         cache_size=1,
+        cache_max_bytes=None,
         num_processes=1,
         numpy_loading=False,
         prefetching=False,
         queue_timeout=None,
+        transport="queue",
+        shared_memory_slots=3,
+        shared_memory_slot_bytes=2**27,
         subprocess_depth=0,
+        idx_map_fn=None,
+        num_epochs=1,
     ):
         self._name = name
         self._size = size
+        # epochs laid out one after another in the positions, by this stage or any
+        # stage it is chained to
+        self._stage_num_epochs = num_epochs
+        self._num_epochs = num_epochs * (
+            base_dataset._num_epochs if isinstance(base_dataset, Dataset) else 1
+        )
         self._base_slice_fn_arg = base_slice_fn
         if base_slice_fn is None:
             self._base_slice_fn = self._default_base_slice_fn
         else:
             self._base_slice_fn = base_slice_fn
         self._trans_fn = trans_fn
+        self._idx_map_fn = idx_map_fn
         self._slice_fn = slice_fn
         if slice_fn is None:
             self._slice_dataset = self._default_slice_fn
@@ -84,13 +393,19 @@ class Dataset:
         self._elementwise_query_fn = elementwise_query_fn
         self._with_caching = with_caching
         self._cache_size = cache_size
-        self._cache = Cache(cache_size)
+        self._cache_max_bytes = cache_max_bytes
+        self._cache = Cache(cache_size, cache_max_bytes)
         self._num_processes = (
             multiprocessing().cpu_count() if num_processes is None else num_processes
         )
         self._numpy_loading = numpy_loading
         self._prefetching = prefetching
         self._queue_timeout = ivy.default(queue_timeout, ivy.get_queue_timeout())
+        assert transport in ["queue", "shared_memory"]
+        self._transport = transport
+        self._shared_memory_slots = shared_memory_slots
+        self._shared_memory_slot_bytes = shared_memory_slot_bytes
+        self._shared_memory_rings = list()
         self._subprocess_depth = subprocess_depth
         self._is_subprocess = bool(subprocess_depth)
         self._first_pass = True
@@ -109,16 +424,28 @@ class Dataset:
         self._base_dataset = base_dataset
         self._workers_initialized = False
         self._has_workers = False
+        self._executor = None
+        self._executor_limit = 1
+        self._prefetcher = None
+        self._batch_sizes = None
+        self._num_calls = 0
+        self._num_items = 0
+        self._wall_time = 0.0
+        self._trans_time = 0.0
+        self._queue_wait_time = 0.0
+        self._num_bytes = 0
 
     # Private #
     # --------#
 
-    def _deep_copy(self, num_processes=None):
+    def _deep_copy(self, num_processes=None, recursive=False):
         # noinspection PyProtectedMember
         return Dataset(
             base_dataset=self._base_dataset
             if isinstance(self._base_dataset, ivy.Container)
-            else self._base_dataset._deep_copy(),
+            else self._base_dataset._deep_copy(
+                num_processes if recursive else None, recursive
+            ),
             name=self._name,
             size=self._size,
             base_slice_fn=self._base_slice_fn_arg,
@@ -127,21 +454,26 @@ class Dataset:
             elementwise_query_fn=self._elementwise_query_fn,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=ivy.default(num_processes, self._num_processes),
             numpy_loading=self._numpy_loading,
             prefetching=self._prefetching,
             queue_timeout=self._queue_timeout,
+            transport=self._transport,
+            shared_memory_slots=self._shared_memory_slots,
+            shared_memory_slot_bytes=self._shared_memory_slot_bytes,
             subprocess_depth=self._subprocess_depth + 1,
+            idx_map_fn=self._idx_map_fn,
+            num_epochs=self._stage_num_epochs,
         )
 
     def _initialize_all_workers(self):
-        if (
-            not isinstance(self._base_dataset, ivy.Container)
-            and self._num_processes == 1
+        if not isinstance(self._base_dataset, ivy.Container) and (
+            self._num_processes == 1 or ivy.exists(self._executor)
         ):
             # noinspection PyProtectedMember
             self._base_dataset._initialize_all_workers()
-        if self._num_processes > 1:
+        if self._num_processes > 1 and not ivy.exists(self._executor):
             self._workers = list()
             self._slice_queues = list()
             self._output_queues = list()
@@ -150,9 +482,25 @@ class Dataset:
                 multiproc = multiprocessing()
                 index_queue = multiproc.Queue()
                 output_queue = multiproc.Queue()
+                # the lazily loaded queue containers used for prefetching expect dicts
+                if self._transport == "shared_memory" and not self._prefetching:
+                    shm_ring = SharedMemoryRing(
+                        self._shared_memory_slots,
+                        self._shared_memory_slot_bytes,
+                        multiproc,
+                    )
+                    self._shared_memory_rings.append(shm_ring)
+                else:
+                    shm_ring = None
                 worker = multiproc.Process(
                     target=self._worker_fn,
-                    args=(index_queue, output_queue, dataset_copy, self._numpy_loading),
+                    args=(
+                        index_queue,
+                        output_queue,
+                        dataset_copy,
+                        self._numpy_loading,
+                        shm_ring,
+                    ),
                 )
                 worker.start()
                 self._slice_queues.append(index_queue)
@@ -207,7 +555,7 @@ class Dataset:
             raise LoggedDatasetException(str(e))
 
     @staticmethod
-    def _worker_fn(index_queue, output_queue, dataset, numpy_loading):
+    def _worker_fn(index_queue, output_queue, dataset, numpy_loading, shm_ring=None):
         while True:
             try:
                 slice_obj = index_queue.get(timeout=1.0)
@@ -215,6 +563,8 @@ class Dataset:
                 continue
             if slice_obj is None:
                 dataset.close()
+                if ivy.exists(shm_ring):
+                    shm_ring.close()
                 return
             if numpy_loading:
                 ivy.set_backend("numpy")
@@ -223,7 +573,25 @@ class Dataset:
                 ivy.previous_backend()
             # if ivy.wrapped_mode():
             #     item = item.to_native(nested=True)
-            output_queue.put(item.cont_to_dict())
+            item_dict = item.cont_to_dict()
+            if ivy.exists(shm_ring):
+                # only the array descriptors are pickled, falling back to pickling
+                # the whole item if it does not fit into a slot
+                written = shm_ring.write(item_dict, dataset._queue_timeout)
+                if ivy.exists(written):
+                    output_queue.put(("shared_memory",) + written)
+                    continue
+            output_queue.put(item_dict)
+
+    def _get_from_output_queue(self, q_idx):
+        start_time = time.perf_counter()
+        item = self._output_queues[q_idx].get(timeout=self._queue_timeout)
+        if isinstance(item, tuple) and item[0] == "shared_memory":
+            item = self._shared_memory_rings[q_idx].read(
+                item[1], item[2], to_ivy=not self._numpy_loading
+            )
+        self._queue_wait_time += time.perf_counter() - start_time
+        return ivy.Container(item)
 
     @staticmethod
     def _empty_queue(queue_in):
@@ -285,13 +653,18 @@ class Dataset:
         base_slice_obj = self._base_slice_fn(slice_obj)
         base_dataset = Dataset._slice_dataset(base_slice_obj, self._base_dataset)
         if self._trans_fn is not None:
+            # only the time spent in this stage is recorded, not in the stages above
+            start_time = time.perf_counter()
             if self._elementwise_query_fn:
                 vals = [
                     self._trans_fn(base_dataset[i])
                     for i in range(base_dataset.cont_shape[0])
                 ]
-                return ivy.Container.cont_list_stack(vals, 0)
-            return self._trans_fn(base_dataset)
+                ret = ivy.Container.cont_list_stack(vals, 0)
+            else:
+                ret = self._trans_fn(base_dataset)
+            self._trans_time += time.perf_counter() - start_time
+            return ret
         return base_dataset
 
     def _get_item_from_slice_objs(self, base_slice_obj, slice_obj):
@@ -331,6 +704,14 @@ class Dataset:
             return slice_obj_0, slice_obj_1
         return slice_obj
 
+    @staticmethod
+    def _slice_keys(slice_obj):
+        if Dataset._is_int(slice_obj.start) and Dataset._is_int(slice_obj.stop):
+            return range(int(round(slice_obj.start)), int(round(slice_obj.stop)))
+        return [
+            float(i) for i in np.arange(slice_obj.start, slice_obj.stop - 1e-3, 1.0)
+        ]
+
     @staticmethod
     def _split_slice_obj(slice_obj, cache):
         if isinstance(slice_obj, numbers.Number):
@@ -338,31 +719,82 @@ class Dataset:
                 return [(True, slice_obj)]
             else:
                 return [(False, slice_obj)]
-        slice_objs = list()
-        start = slice_obj.start
-        for i in np.arange(slice_obj.start, slice_obj.stop, 1.0):
-            if i in cache:
-                if i != start:
-                    slice_objs.append((False, slice(start, i, 1)))
-                slice_objs.append((True, slice(i, i + 1, 1)))
-                start = i + 1
-        if start < slice_obj.stop:
-            slice_objs.append((False, slice(start, slice_obj.stop, 1)))
-        elif len(slice_objs) == 0:
+        keys = Dataset._slice_keys(slice_obj)
+        if len(keys) == 0:
             return [(False, slice_obj)]
+        # contiguous runs of cached and uncached keys, found in a single pass
+        slice_objs = list()
+        run_start = keys[0]
+        run_cached = keys[0] in cache
+        for key in keys[1:]:
+            cached = key in cache
+            if cached != run_cached:
+                slice_objs.append((run_cached, slice(run_start, key, 1)))
+                run_start = key
+                run_cached = cached
+        slice_objs.append((run_cached, slice(run_start, slice_obj.stop, 1)))
         return slice_objs
 
+    def _get_from_cache(self, so):
+        if isinstance(so, numbers.Number):
+            return self._cache[so].resolve()
+        entries = [self._cache[key] for key in self._slice_keys(so)]
+        # consecutive entries referencing the same cached item are sliced at once
+        items = list()
+        group_start = 0
+        for i in range(1, len(entries) + 1):
+            if (
+                i < len(entries)
+                and ivy.exists(entries[i].idx)
+                and ivy.exists(entries[group_start].idx)
+                and entries[i].item is entries[group_start].item
+                and entries[i].idx == entries[group_start].idx + i - group_start
+            ):
+                continue
+            items.append(entries[group_start].resolve(i - group_start))
+            group_start = i
+        return self._join_items(items)
+
     def _add_to_cache(self, so, item):
         if isinstance(so, numbers.Number):
-            self._cache[so] = item
-        else:
-            for i in np.arange(so.start, so.stop - 1e-3, 1.0):
-                self._cache[i] = Dataset._slice_dataset(i - so.start, item)
+            self._cache[so] = _CacheEntry(item)
+            return
+        keys = self._slice_keys(so)
+        item_bytes = (
+            _nbytes(item) / max(len(keys), 1)
+            if ivy.exists(self._cache_max_bytes)
+            else 0
+        )
+        for idx, key in enumerate(keys):
+            self._cache[key] = _CacheEntry(item, idx, item_bytes)
 
     def __del__(self):
         self.close()
 
+    def _get_item_from_mapped_idxs(self, slice_obj):
+        if isinstance(slice_obj, numbers.Number):
+            base_idx = int(self._idx_map_fn(np.array([int(slice_obj)]))[0])
+            item = Dataset._slice_dataset(base_idx, self._base_dataset)
+            return self._trans_fn(item) if self._trans_fn is not None else item
+        stop = slice_obj.stop
+        if stop <= slice_obj.start:
+            stop += self._size
+        idxs = np.arange(int(slice_obj.start), int(stop)) % int(self._size)
+        base_idxs = np.asarray(self._idx_map_fn(idxs))
+        # consecutive base indices are fetched together, as a single slice
+        run_ends = np.nonzero(np.diff(base_idxs) != 1)[0] + 1
+        items = [
+            Dataset._slice_dataset(
+                slice(int(run[0]), int(run[-1]) + 1, 1), self._base_dataset
+            )
+            for run in np.split(base_idxs, run_ends)
+        ]
+        item = self._join_items(items)
+        return self._trans_fn(item) if self._trans_fn is not None else item
+
     def _get_item_after_cache_n_wrap(self, slice_obj):
+        if ivy.exists(self._idx_map_fn):
+            return self._get_item_from_mapped_idxs(slice_obj)
         base_slice_obj = self._wrap_base_slice_obj(slice_obj)
         return self._get_item_from_slice_objs(base_slice_obj, slice_obj)
 
@@ -374,10 +806,15 @@ class Dataset:
         sos_for_cache = list()
         for from_cache, so in split_slice_objs:
             if from_cache:
-                so_key = so if isinstance(so, numbers.Number) else so.start
-                items.append(self._cache[so_key])
+                items.append(self._get_from_cache(so))
                 continue
             item = self._get_item_after_cache_n_wrap(so)
+            if self._cache_size > 0:
+                self._cache.record_misses(
+                    1
+                    if isinstance(so, numbers.Number)
+                    else math.ceil(so.stop - so.start - 1e-3)
+                )
             if self._with_caching:
                 sos_for_cache.append(so)
                 items_for_cache.append(item)
@@ -385,9 +822,13 @@ class Dataset:
         if self._cache_size > 0:
             for so, item in zip(sos_for_cache, items_for_cache):
                 self._add_to_cache(so, item)
+        if len(items) == 1 and isinstance(slice_obj, numbers.Number):
+            return items[0]
+        return self._join_items(items)
+
+    @staticmethod
+    def _join_items(items):
         if len(items) == 1:
-            if isinstance(slice_obj, numbers.Number):
-                return items[0]
             return items[0].cont_map(lambda x, kc: x if isinstance(x, list) else [x])
         items_as_lists = [
             item.cont_map(lambda x, kc: x if isinstance(x, list) else [x])
@@ -395,12 +836,18 @@ class Dataset:
         ]
         return ivy.Container.cont_list_join(items_as_lists)
 
-    # Public #
-    # -------#
+    def _with_bytes_recorded(self, item):
+        self._num_bytes += _nbytes(item)
+        return item
 
-    def __getitem__(self, slice_obj):
+    def _fetch(self, slice_obj):
         if not self._workers_initialized:
             self._initialize_all_workers()
+        if ivy.exists(self._prefetcher) and isinstance(slice_obj, numbers.Number):
+            start_time = time.perf_counter()
+            ret = self._prefetcher.get(slice_obj)
+            self._queue_wait_time += time.perf_counter() - start_time
+            return self._with_bytes_recorded(ret)
         if self._numpy_loading:
             ivy.set_backend("numpy")
         if self._num_processes < 2 or isinstance(slice_obj, numbers.Number):
@@ -408,9 +855,12 @@ class Dataset:
             if self._numpy_loading:
                 ivy.previous_backend()
             self._first_pass = False
-            return ret
+            return self._with_bytes_recorded(ret)
         slice_size = int(round(slice_obj.stop - slice_obj.start))
-        num_sub_slices = min(slice_size, self._num_processes)
+        if ivy.exists(self._executor):
+            num_sub_slices = min(slice_size, self._executor_limit)
+        else:
+            num_sub_slices = min(slice_size, self._num_processes)
         slice_points = np.linspace(slice_obj.start, slice_obj.stop, num_sub_slices + 1)
         slice_sizes = np.round(slice_points[1:] - slice_points[:-1]).astype(np.int32)
         if Dataset._is_int(slice_obj.start) and Dataset._is_int(slice_obj.stop):
@@ -419,10 +869,22 @@ class Dataset:
             slice(slice_points[i], slice_points[i + 1], 1.0)
             for i in range(num_sub_slices)
         ]
+        if ivy.exists(self._executor):
+            start_time = time.perf_counter()
+            items_as_lists = self._executor.map(self._name, sub_slices)
+            self._queue_wait_time += time.perf_counter() - start_time
+            if self._numpy_loading:
+                ivy.previous_backend()
+            self._first_pass = False
+            return self._with_bytes_recorded(
+                ivy.Container.cont_list_join(items_as_lists)
+            )
         if self._prefetching:
             self._queue_offset = int(not self._queue_offset)
         else:
-            self._queue_offset = np.random.randint(0, self._num_processes)
+            # round robin, so the worker serving each sub-slice does not depend on
+            # the global random state
+            self._queue_offset = (self._queue_offset + 1) % self._num_processes
         q_idxs = [
             int((i + self._queue_offset) % self._num_processes)
             for i in range(len(sub_slices))
@@ -446,6 +908,9 @@ class Dataset:
                 queue_timeout=self._queue_timeout,
             )
         else:
+            # slots of items which have since been consumed are free for the workers
+            for shm_ring in self._shared_memory_rings:
+                shm_ring.release_collected()
             [
                 slice_queue.put(sub_slice)
                 for slice_queue, sub_slice in zip(slice_queues, sub_slices)
@@ -454,17 +919,58 @@ class Dataset:
             #     items_as_lists = [ivy.Container(output_queue.get(timeout=self._queue_timeout)).to_ivy()
             #                       for output_queue in output_queues]
             # else:
-            items_as_lists = [
-                ivy.Container(output_queue.get(timeout=self._queue_timeout))
-                for output_queue in output_queues
-            ]
+            items_as_lists = [self._get_from_output_queue(qi) for qi in q_idxs]
             if self._numpy_loading:
                 ivy.previous_backend()
             self._first_pass = False
-            return ivy.Container.cont_list_join(items_as_lists)
+            return self._with_bytes_recorded(
+                ivy.Container.cont_list_join(items_as_lists)
+            )
+
+    # Public #
+    # -------#
+
+    def __getitem__(self, slice_obj):
+        start_time = time.perf_counter()
+        ret = self._fetch(slice_obj)
+        self._wall_time += time.perf_counter() - start_time
+        self._num_calls += 1
+        if isinstance(slice_obj, numbers.Number):
+            self._num_items += 1
+        else:
+            self._num_items += int(round(slice_obj.stop - slice_obj.start))
+        return ret
+
+    def _thread_prefetched(self, name, depth, trans_fn=None):
+        # the thread shares the ivy backend of the parent process, and so upstream
+        # stages should not switch backends via numpy_loading
+        prefetched = Dataset(
+            base_dataset=self,
+            name=name,
+            size=self._size,
+            trans_fn=trans_fn,
+            with_caching=False,
+            cache_size=0,
+            num_processes=1,
+            numpy_loading=False,
+            queue_timeout=self._queue_timeout,
+        )
+        if ivy.exists(trans_fn):
+            fetch_fn = lambda idx: trans_fn(self[idx])
+        else:
+            fetch_fn = self.__getitem__
+        prefetched._prefetcher = ThreadPrefetcher(fetch_fn, depth, self._queue_timeout)
+        return prefetched
 
     def map(
-        self, name, map_func, num_processes=1, base_slice_fn=None, numpy_loading=None
+        self,
+        name,
+        map_func,
+        num_processes=1,
+        base_slice_fn=None,
+        numpy_loading=None,
+        transport="queue",
+        elementwise_query_fn=True,
     ):
         return Dataset(
             base_dataset=self,
@@ -472,25 +978,22 @@ class Dataset:
             size=self._size,
             base_slice_fn=base_slice_fn,
             trans_fn=map_func,
+            elementwise_query_fn=elementwise_query_fn,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
             else numpy_loading,
             queue_timeout=self._queue_timeout,
+            transport=transport,
         )
 
     def batch(self, name, batch_size, num_processes=1, numpy_loading=None):
         def batch_array(x, _):
             return [
-                ivy.concat(
-                    [
-                        ivy.expand_dims(item, axis=0)
-                        for item in x[i * batch_size : i * batch_size + batch_size]
-                    ],
-                    axis=0,
-                )
+                _stack_items(x[i * batch_size : i * batch_size + batch_size])
                 for i in range(math.ceil((len(x) / batch_size)))
             ]
 
@@ -510,7 +1013,7 @@ class Dataset:
                 base_slice_obj = slice(so_start, so_stop, 1)
             return base_slice_obj
 
-        return Dataset(
+        batched = Dataset(
             base_dataset=self,
             name=name,
             size=float(self._size / batch_size),
@@ -519,12 +1022,16 @@ class Dataset:
             elementwise_query_fn=False,
             with_caching=self._with_caching,
             cache_size=int(math.ceil(self._cache_size / batch_size)),
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
             else numpy_loading,
             queue_timeout=self._queue_timeout,
         )
+        # lets unbatch find the sizes without loading every batch
+        batched._batch_sizes = batch_size
+        return batched
 
     def unbatch(
         self,
@@ -534,33 +1041,32 @@ class Dataset:
         cache_size=None,
         batch_sizes=None,
     ):
-        unbatch_slice_dict = dict()
-        slice_dict = dict()
-        size_so_far = 0
         size = math.ceil(self._size)
+        batch_sizes = ivy.default(batch_sizes, self._batch_sizes)
+        if batch_sizes is None:
+            # sizes which are not known upfront can only be found by loading each batch
+            batch_sizes = [self._get_item(i).cont_shape[0] for i in range(size)]
         if isinstance(batch_sizes, int):
-            batch_sizes = [batch_sizes] * size
-        for i in range(size):
-            if batch_sizes is None:
-                data = self._get_item(i)
-                data_size = data.cont_shape[0]
-            else:
-                data_size = batch_sizes[i]
-            if i == size - 1 and self._size % 1 != 0:
-                data_size = int(
-                    round(data_size * (self._size - math.floor(self._size)))
-                )
-            for j in range(data_size):
-                unbatch_slice_dict[size_so_far + j] = i
-                slice_dict[size_so_far + j] = j
-            size_so_far += data_size
-        unrolled_size = size_so_far
+            batch_sizes = np.full(size, batch_sizes, dtype=np.int64)
+        else:
+            batch_sizes = np.array(batch_sizes[:size], dtype=np.int64)
+        if size > 0 and self._size % 1 != 0:
+            batch_sizes[-1] = int(
+                round(batch_sizes[-1] * (self._size - math.floor(self._size)))
+            )
+        # element i belongs to the first batch whose cumulative size exceeds i
+        cum_sizes = np.cumsum(batch_sizes)
+        batch_starts = cum_sizes - batch_sizes
+        unrolled_size = int(cum_sizes[-1]) if size > 0 else 0
+
+        def batch_idx(idx):
+            return int(np.searchsorted(cum_sizes, idx, side="right"))
 
         def base_slice_fn(slice_obj):
             if isinstance(slice_obj, numbers.Number):
                 slice_obj = slice(slice_obj, slice_obj + 1, 1)
-            so_start = unbatch_slice_dict[slice_obj.start]
-            so_stop = unbatch_slice_dict[slice_obj.stop - 1] + 1
+            so_start = batch_idx(slice_obj.start)
+            so_stop = batch_idx(slice_obj.stop - 1) + 1
             so_stop = so_stop + 1 if so_stop == so_start else so_stop
             return slice(so_start, so_stop, 1)
 
@@ -573,13 +1079,18 @@ class Dataset:
 
         def slice_fn(slice_obj, sliced_dataset, dataset_size):
             if isinstance(slice_obj, numbers.Number):
-                return Dataset._slice_dataset(slice_dict[slice_obj], sliced_dataset)
+                return Dataset._slice_dataset(
+                    int(slice_obj - batch_starts[batch_idx(slice_obj)]),
+                    sliced_dataset,
+                )
             else:
                 if slice_obj.stop > slice_obj.start:
                     slice_size = slice_obj.stop - slice_obj.start
                 else:
                     slice_size = slice_obj.stop + unrolled_size - slice_obj.start
-                so_start = slice_dict[slice_obj.start]
+                so_start = int(
+                    slice_obj.start - batch_starts[batch_idx(slice_obj.start)]
+                )
                 so_stop = so_start + slice_size
                 so = slice(so_start, so_stop, 1)
                 return Dataset._slice_dataset(so, sliced_dataset)
@@ -596,6 +1107,7 @@ class Dataset:
             cache_size=int(math.ceil(self._cache_size * unrolled_size / self._size))
             if cache_size is None
             else cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
@@ -603,46 +1115,130 @@ class Dataset:
             queue_timeout=self._queue_timeout,
         )
 
-    def shuffle(self, name, shuffle_buffer_size, num_processes=1, numpy_loading=None):
+    def shuffle(
+        self,
+        name,
+        shuffle_buffer_size,
+        num_processes=1,
+        numpy_loading=None,
+        seed=None,
+        num_epochs=2**16,
+    ):
+        """
+        Shuffle the indices within consecutive blocks of the buffer size. The
+        positions of all epochs are laid out one after another, so that every epoch
+        is shuffled differently, and a seeded shuffle only depends on the seed, the
+        epoch and the block.
+
+        :param name: The name of the shuffled dataset.
+        :param shuffle_buffer_size: Number of consecutive items shuffled together.
+        :param num_processes: Number of processes for loading the shuffled items.
+        :param numpy_loading: Whether to load the items with the numpy backend.
+        :param seed: Seed for the permutations. Default is drawn once from the global
+                     numpy random state.
+        :param num_epochs: Number of epochs before the positions wrap back to the
+                           first epoch. Default is 2**16.
+        :return: The shuffled dataset, with size * num_epochs positions.
+        """
         if shuffle_buffer_size == 0:
             return self
+        # a permutation evicted from the cache is recomputed identically when queried
+        # again, and is shared by all processes
+        if not ivy.exists(seed):
+            seed = int(np.random.randint(2**31))
+        size = int(math.ceil(self._size))
+        num_blocks = int(math.ceil(size / shuffle_buffer_size))
+        # only the indices are shuffled, within consecutive blocks of the buffer size
+        perms = Cache(2)
 
-        def cont_shuffle_fn(cont):
-            return cont.shuffle()
+        def block_perm(epoch, block_idx):
+            if (epoch, block_idx) in perms:
+                return perms[(epoch, block_idx)]
+            block_size = min(
+                shuffle_buffer_size, size - block_idx * shuffle_buffer_size
+            )
+            rng = np.random.RandomState([seed, epoch, block_idx])
+            perm = rng.permutation(block_size)
+            perms[(epoch, block_idx)] = perm
+            return perm
 
-        pre_shuffled = self.batch(
-            "pre_" + name,
-            shuffle_buffer_size,
-            num_processes=num_processes,
-            numpy_loading=self._numpy_loading
-            if numpy_loading is None
-            else numpy_loading,
-        )
-        shuffled = Dataset(
-            base_dataset=pre_shuffled,
+        def idx_map_fn(idxs):
+            epochs, local_idxs = np.divmod(idxs, size)
+            block_idxs = local_idxs // shuffle_buffer_size
+            keys = epochs * num_blocks + block_idxs
+            base_idxs = np.empty_like(idxs)
+            for key in np.unique(keys):
+                mask = keys == key
+                epoch, block_idx = divmod(int(key), num_blocks)
+                base_idxs[mask] = (
+                    block_idx * shuffle_buffer_size
+                    + block_perm(epoch, block_idx)[
+                        local_idxs[mask] % shuffle_buffer_size
+                    ]
+                )
+            return base_idxs
+
+        return Dataset(
+            base_dataset=self,
             name=name,
-            size=pre_shuffled.size,
-            trans_fn=cont_shuffle_fn,
+            size=size * num_epochs,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
             else numpy_loading,
             queue_timeout=self._queue_timeout,
+            idx_map_fn=idx_map_fn,
+            num_epochs=num_epochs,
         )
-        post_shuffled = shuffled.unbatch(
-            "post_" + name,
+
+    def sample(
+        self, name, sampler, num_epochs=2**16, num_processes=1, numpy_loading=None
+    ):
+        """
+        Reorder the dataset by a sampler, which maps each position to an item index.
+        The positions of all epochs are laid out one after another, so that a
+        position alone determines its epoch, and any look-ahead across an epoch
+        boundary already uses the order of the next epoch.
+
+        :param name: The name of the sampled dataset.
+        :param sampler: Sampler to map the positions with, see ivy_builder.sampler.
+        :param num_epochs: Number of epochs before the positions wrap back to the
+                           first epoch. Default is 2**16.
+        :param num_processes: Number of processes for loading the sampled items.
+        :param numpy_loading: Whether to load the items with the numpy backend.
+        :return: The sampled dataset, with len(sampler) * num_epochs positions.
+        """
+        return Dataset(
+            base_dataset=self,
+            name=name,
+            size=len(sampler) * num_epochs,
+            with_caching=self._with_caching,
+            cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
             else numpy_loading,
-            cache_size=self._cache_size,
-            batch_sizes=shuffle_buffer_size,
+            queue_timeout=self._queue_timeout,
+            idx_map_fn=sampler,
+            num_epochs=num_epochs,
         )
-        return post_shuffled
 
-    def prefetch(self, name, numpy_loading=None):
+    def prefetch(self, name, numpy_loading=None, depth=1, backend="process"):
+        assert backend in ["process", "thread"]
+        if backend == "thread":
+            return self._thread_prefetched(name, depth)
+        if depth != 1:
+            raise Exception(
+                "the process prefetching backend only supports a depth of 1, "
+                "but found {}. Use the thread backend for deeper prefetching.".format(
+                    depth
+                )
+            )
+
         # noinspection PyUnresolvedReferences
         def base_slice_fn(slc_obj):
             if isinstance(slc_obj, numbers.Number):
@@ -663,6 +1259,7 @@ class Dataset:
             base_slice_fn=base_slice_fn,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=1,
             numpy_loading=self._numpy_loading
             if numpy_loading is None
@@ -670,10 +1267,15 @@ class Dataset:
             queue_timeout=self._queue_timeout,
         )
 
-    def to_dev(self, name, dev_str, num_processes=1):
+    def to_dev(self, name, dev_str, num_processes=1, num_buffers=0, copy_fn=None):
         def cont_to_dev(cont):
+            if ivy.exists(copy_fn):
+                return copy_fn(cont, dev_str)
             return cont.to_device(dev_str)
 
+        if num_buffers > 0:
+            # the next batches are copied to the device while the current one is used
+            return self._thread_prefetched(name, num_buffers, cont_to_dev)
         return Dataset(
             base_dataset=self,
             name=name,
@@ -681,15 +1283,22 @@ class Dataset:
             trans_fn=cont_to_dev,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=False,
             queue_timeout=self._queue_timeout,
         )
 
-    def to_devs(self, name, dev_strs, axis=0, num_processes=1):
+    def to_devs(
+        self, name, dev_strs, axis=0, num_processes=1, num_buffers=0, copy_fn=None
+    ):
         def cont_to_devs(cont):
+            if ivy.exists(copy_fn):
+                return copy_fn(cont, dev_strs)
             return cont.to_multi_dev(dev_strs, axis)
 
+        if num_buffers > 0:
+            return self._thread_prefetched(name, num_buffers, cont_to_devs)
         return Dataset(
             base_dataset=self,
             name=name,
@@ -697,6 +1306,7 @@ class Dataset:
             trans_fn=cont_to_devs,
             with_caching=self._with_caching,
             cache_size=self._cache_size,
+            cache_max_bytes=self._cache_max_bytes,
             num_processes=num_processes,
             numpy_loading=False,
             queue_timeout=self._queue_timeout,
@@ -706,11 +1316,13 @@ class Dataset:
         logging.info(
             "\nabout to cycle through all elements in dataset {}!\n".format(self._name)
         )
-        log_freq = max(round(self._size / num_logs), 1)
-        for i in range(offset, math.ceil(self._size)):
+        # the positions of later epochs are the same elements in another order
+        epoch_size = self._size / self._num_epochs
+        log_freq = max(round(epoch_size / num_logs), 1)
+        for i in range(offset, math.ceil(epoch_size)):
             if i % log_freq == 0:
-                logging.info("loading element {} of {}".format(i, self._size))
-                logging.info("{}%".format((i / self._size) * 100))
+                logging.info("loading element {} of {}".format(i, epoch_size))
+                logging.info("{}%".format((i / epoch_size) * 100))
             # noinspection PyTypeChecker
             data = self[i]
             if i == 0:
@@ -722,7 +1334,40 @@ class Dataset:
             )
         )
 
+    def stats(self):
+        """
+        Per-stage counters of this dataset and every dataset it is chained to, keyed
+        by stage name. Stages which run inside worker processes record their counters
+        in those processes, and so only the stages queried by this process count.
+
+        :return: Container of the number of calls and items, wall time, time spent
+                 in the stage function, time spent waiting on worker queues, cache
+                 hits and misses, and bytes produced, for each stage.
+        """
+        stats = dict()
+        stage = self
+        while isinstance(stage, Dataset):
+            # noinspection PyProtectedMember
+            stats[stage.name] = ivy.Container(
+                num_calls=stage._num_calls,
+                num_items=stage._num_items,
+                wall_time=stage._wall_time,
+                items_per_second=stage._num_items / stage._wall_time
+                if stage._wall_time > 0
+                else 0.0,
+                trans_time=stage._trans_time,
+                queue_wait_time=stage._queue_wait_time,
+                cache_hits=stage._cache.stats.hits,
+                cache_misses=stage._cache.stats.misses,
+                num_bytes=stage._num_bytes,
+            )
+            # noinspection PyProtectedMember
+            stage = stage._base_dataset
+        return ivy.Container(stats)
+
     def close(self):
+        if ivy.exists(self._prefetcher):
+            self._prefetcher.close()
         if not isinstance(self._base_dataset, ivy.Container):
             self._base_dataset.close()
         if self._has_workers:
@@ -740,6 +1385,9 @@ class Dataset:
                 for w in self._workers:
                     if w.is_alive():
                         w.terminate()
+                for shm_ring in self._shared_memory_rings:
+                    shm_ring.close(unlink=True)
+                self._shared_memory_rings = list()
         self._has_workers = False
 
     # Getters #
@@ -752,3 +1400,143 @@ class Dataset:
     @property
     def size(self):
         return self._size
+
+    @property
+    def cache_stats(self):
+        return self._cache.stats
+
+    @property
+    def trans_time(self):
+        return self._trans_time
+
+
+class DatasetExecutor:
+    def __init__(self, dataset, num_workers=None, stage_limits=None):
+        """
+        pipeline-level pool of worker processes, which schedules the work for every
+        multi-process stage of a chained dataset. Each worker holds one
+        single-process copy of the whole chain, rather than one copy per stage.
+        """
+        self._dataset = dataset
+        self._num_workers = ivy.default(num_workers, multiprocessing().cpu_count())
+        stage_limits = ivy.default(stage_limits, dict())
+        self._stages = list()
+        stage = dataset
+        # noinspection PyProtectedMember
+        while isinstance(stage, Dataset):
+            if stage._num_processes > 1:
+                stage._executor = self
+                stage._executor_limit = max(
+                    min(
+                        stage_limits.get(stage.name, stage._num_processes),
+                        self._num_workers,
+                    ),
+                    1,
+                )
+                self._stages.append(stage)
+            stage = stage._base_dataset
+        self._task_count = 0
+        self._results = dict()
+        self._workers = list()
+        self._has_workers = False
+
+    # Private #
+    # --------#
+
+    def _initialize_workers(self):
+        multiproc = multiprocessing()
+        self._task_queue = multiproc.Queue()
+        self._result_queue = multiproc.Queue()
+        # noinspection PyProtectedMember
+        dataset_copy = self._dataset._deep_copy(1, recursive=True)
+        for _ in range(self._num_workers):
+            worker = multiproc.Process(
+                target=self._worker_fn,
+                args=(self._task_queue, self._result_queue, dataset_copy),
+            )
+            worker.start()
+            self._workers.append(worker)
+        self._has_workers = True
+
+    @staticmethod
+    def _worker_fn(task_queue, result_queue, dataset):
+        stages = dict()
+        stage = dataset
+        # noinspection PyProtectedMember
+        while isinstance(stage, Dataset):
+            stages[stage.name] = stage
+            stage = stage._base_dataset
+        while True:
+            try:
+                task = task_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if task is None:
+                dataset.close()
+                return
+            task_id, stage_name, slice_obj = task
+            try:
+                item = Dataset._slice_dataset_with_error_checks(
+                    stages[stage_name], slice_obj
+                )
+            except LoggedDatasetException as e:
+                result_queue.put((task_id, None, str(e)))
+                continue
+            result_queue.put((task_id, item.cont_to_dict(), None))
+
+    def _result(self, task_id, timeout):
+        while task_id not in self._results:
+            ret_id, item, error = self._result_queue.get(timeout=timeout)
+            self._results[ret_id] = (item, error)
+        item, error = self._results.pop(task_id)
+        if ivy.exists(error):
+            raise LoggedDatasetException(error)
+        return ivy.Container(item)
+
+    # Public #
+    # -------#
+
+    def submit(self, stage_name, slice_obj):
+        if not self._has_workers:
+            self._initialize_workers()
+        task_id = self._task_count
+        self._task_count += 1
+        self._task_queue.put((task_id, stage_name, slice_obj))
+        return task_id
+
+    def map(self, stage_name, slice_objs, timeout=None):
+        timeout = ivy.default(timeout, self._dataset._queue_timeout)
+        task_ids = [self.submit(stage_name, so) for so in slice_objs]
+        return [self._result(task_id, timeout) for task_id in task_ids]
+
+    def close(self):
+        for stage in self._stages:
+            stage._executor = None
+        if not self._has_workers:
+            return
+        try:
+            for _ in self._workers:
+                self._task_queue.put(None)
+            for w in self._workers:
+                w.join(timeout=0.25)
+            for q in [self._task_queue, self._result_queue]:
+                q.cancel_join_thread()
+                q.close()
+        finally:
+            for w in self._workers:
+                if w.is_alive():
+                    w.terminate()
+        self._workers = list()
+        self._has_workers = False
+
+    # Getters #
+    # --------#
+
+    @property
+    def num_workers(self):
+        return self._num_workers
+
+    @property
+    def stage_limits(self):
+        # noinspection PyProtectedMember
+        return {stage.name: stage._executor_limit for stage in self._stages}
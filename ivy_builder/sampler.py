@@ -0,0 +1,97 @@
+# global
+import numpy as np
+
+# local
+from ivy_builder.dataset import Cache
+
+
+class Sampler:
+    def __init__(self, num_items, num_samples=None, seed=0):
+        """
+        base class for mapping positions to item indices, epoch by epoch. The order of
+        each epoch only depends on the seed and the epoch, and so every process and
+        every look-ahead produces the same indices for the same positions.
+
+        :param num_items: Number of items to sample from.
+        :param num_samples: Number of samples in each epoch. Default is num_items.
+        :param seed: Seed which, together with the epoch, determines the order.
+        """
+        self._num_items = num_items
+        self._num_samples = num_items if num_samples is None else num_samples
+        self._seed = seed
+        self._epoch_idxs = Cache(2)
+
+    def _compute_epoch_idxs(self, epoch):
+        raise NotImplementedError
+
+    def epoch_idxs(self, epoch):
+        """
+        the item indices of every position in the given epoch, as a numpy array
+        """
+        if epoch not in self._epoch_idxs:
+            self._epoch_idxs[epoch] = self._compute_epoch_idxs(epoch)
+        return self._epoch_idxs[epoch]
+
+    def __call__(self, positions):
+        # positions beyond the first epoch belong to the later epochs
+        positions = np.asarray(positions)
+        epochs, local_positions = np.divmod(positions, self._num_samples)
+        idxs = np.empty_like(positions)
+        for epoch in np.unique(epochs):
+            mask = epochs == epoch
+            idxs[mask] = self.epoch_idxs(int(epoch))[local_positions[mask]]
+        return idxs
+
+    def __len__(self):
+        return self._num_samples
+
+    # Getters #
+    # --------#
+
+    @property
+    def num_items(self):
+        return self._num_items
+
+    @property
+    def seed(self):
+        return self._seed
+
+
+class SequentialSampler(Sampler):
+    def _compute_epoch_idxs(self, epoch):
+        return np.arange(self._num_samples) % self._num_items
+
+
+class RandomSampler(Sampler):
+    def _compute_epoch_idxs(self, epoch):
+        rng = np.random.RandomState([self._seed, epoch])
+        num_perms = -(-self._num_samples // self._num_items)
+        return np.concatenate(
+            [rng.permutation(self._num_items) for _ in range(num_perms)]
+        )[: self._num_samples]
+
+
+class WeightedSampler(Sampler):
+    def __init__(self, weights, num_samples=None, seed=0, replacement=True):
+        """
+        samples items with probabilities proportional to their weights.
+
+        :param weights: Non-negative weight of each item.
+        :param num_samples: Number of samples in each epoch. Default is the number
+                            of items.
+        :param seed: Seed which, together with the epoch, determines the order.
+        :param replacement: Whether items can be sampled more than once per epoch.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        self._probs = weights / np.sum(weights)
+        self._replacement = replacement
+        super(WeightedSampler, self).__init__(len(weights), num_samples, seed)
+
+    def _compute_epoch_idxs(self, epoch):
+        rng = np.random.RandomState([self._seed, epoch])
+        return rng.choice(
+            self._num_items,
+            self._num_samples,
+            replace=self._replacement,
+            p=self._probs,
+        )
@@ -21,6 +21,11 @@ class TrainerSpec(Spec, abc.ABC):
         ld_chkpt: bool = False,
         save_freq: int = 1000,
         save_at_end: bool = True,
+        async_checkpointing: bool = False,
+        max_checkpoints_to_keep: int = 20,
+        keep_checkpoint_every_n_steps: int = None,
+        keep_best_checkpoints: int = 0,
+        checkpoint_format: str = "hdf5",
         log_freq: int = 100,
         log_at_end: bool = True,
         vis_freq: int = 500,
@@ -28,6 +33,8 @@ class TrainerSpec(Spec, abc.ABC):
         log_validation: bool = True,
         log_time: bool = True,
         log_learning_rate: bool = True,
+        summary_queue_size: int = 1024,
+        log_data_loader_stats: bool = False,
         starting_iteration: int = None,
         total_iterations: int = 1e6,
         initial_learning_rate: float = 1e-4,
@@ -98,6 +105,11 @@ class TrainerSpec(Spec, abc.ABC):
             ld_chkpt=ld_chkpt,
             save_freq=save_freq,
             save_at_end=save_at_end,
+            async_checkpointing=async_checkpointing,
+            max_checkpoints_to_keep=max_checkpoints_to_keep,
+            keep_checkpoint_every_n_steps=keep_checkpoint_every_n_steps,
+            keep_best_checkpoints=keep_best_checkpoints,
+            checkpoint_format=checkpoint_format,
             log_freq=log_freq,
             log_at_end=log_at_end,
             vis_freq=vis_freq,
@@ -105,6 +117,8 @@ class TrainerSpec(Spec, abc.ABC):
             log_validation=log_validation,
             log_time=log_time,
             log_learning_rate=log_learning_rate,
+            summary_queue_size=summary_queue_size,
+            log_data_loader_stats=log_data_loader_stats,
             starting_iteration=starting_iteration,
             total_iterations=total_iterations,
             initial_learning_rate=initial_learning_rate,
@@ -0,0 +1,320 @@
+# global
+import os
+import ivy
+import time
+import socket
+import struct
+import logging
+import threading
+import collections
+import numpy as np
+
+# the statistics which can be logged for each leaf, and their tensorboard names
+LEAF_STATS = {
+    "mean": "mean",
+    "abs_mean": "abs mean",
+    "var": "var",
+    "abs_var": "abs var",
+    "min": "min",
+    "abs_min": "abs min",
+    "max": "max",
+    "abs_max": "abs max",
+    "vector_norm": "vector norm",
+}
+
+
+def _reduce(x, stats):
+    # x is of shape [num_leaves, leaf_size], and is reduced along the last axis
+    abs_x = ivy.abs(x) if any(s.startswith("abs_") for s in stats) else None
+    fns = {
+        "mean": lambda: ivy.mean(x, axis=-1),
+        "abs_mean": lambda: ivy.mean(abs_x, axis=-1),
+        "var": lambda: ivy.var(x, axis=-1),
+        "abs_var": lambda: ivy.var(abs_x, axis=-1),
+        "min": lambda: ivy.min(x, axis=-1),
+        "abs_min": lambda: ivy.min(abs_x, axis=-1),
+        "max": lambda: ivy.max(x, axis=-1),
+        "abs_max": lambda: ivy.max(abs_x, axis=-1),
+        "vector_norm": lambda: ivy.vector_norm(x, axis=-1),
+    }
+    return ivy.stack([fns[s]() for s in stats], axis=-1)
+
+
+def nested_stats(nest, stats):
+    """
+    computes the requested statistics for every leaf of the nest. Leaves of the same
+    size on the same device are stacked and reduced together, and all results are
+    copied to the host at once for each device, rather than once per statistic.
+
+    :param nest: Container of arrays.
+    :param stats: Statistics to compute, any of LEAF_STATS or "global_vector_norm".
+    :return: List of (name, value) tuples, with names relative to the nest root.
+    """
+    leaf_stats = [s for s in LEAF_STATS if s in stats]
+    global_norm = "global_vector_norm" in stats
+    computed = leaf_stats + (
+        ["vector_norm"] if global_norm and "vector_norm" not in leaf_stats else []
+    )
+    key_chains = nest.cont_all_key_chains()
+    leaves = nest.cont_to_flat_list()
+    if not computed or not leaves:
+        return []
+
+    # group the leaves which can be stacked
+    groups = dict()
+    for i, v in enumerate(leaves):
+        v = v if ivy.is_array(v) else ivy.array(v)
+        size = int(np.prod(v.shape))
+        groups.setdefault((ivy.dev(v), size), []).append((i, v))
+
+    # reduce each group on its device
+    dev_results = dict()
+    for (dev, _), group in groups.items():
+        idxs, arrays = zip(*group)
+        x = ivy.stack([ivy.astype(ivy.reshape(a, (-1,)), "float32") for a in arrays])
+        dev_idxs, dev_reduced = dev_results.setdefault(dev, ([], []))
+        dev_idxs.extend(idxs)
+        dev_reduced.append(_reduce(x, computed))
+
+    # one device to host copy for each device
+    values = np.empty((len(leaves), len(computed)), dtype=np.float32)
+    for dev_idxs, dev_reduced in dev_results.values():
+        values[dev_idxs] = ivy.to_numpy(ivy.concat(dev_reduced, axis=0))
+
+    ret = list()
+    for key_chain, leaf_values in zip(key_chains, values):
+        for stat, value in zip(computed, leaf_values):
+            if stat in leaf_stats:
+                ret.append((key_chain + "/" + LEAF_STATS[stat], float(value)))
+    if global_norm:
+        # the norm of every sub-container follows from the norms of its leaves
+        norms = values[:, computed.index("vector_norm")]
+        norms_sq = dict()
+        for key_chain, norm in zip(key_chains, norms):
+            keys = key_chain.split("/")
+            for j in range(len(keys)):
+                prefix = "/".join(keys[:j])
+                norms_sq[prefix] = norms_sq.get(prefix, 0.0) + float(norm) ** 2
+        for prefix, norm_sq in norms_sq.items():
+            name = prefix + "/global vector norm" if prefix else "global vector norm"
+            ret.append((name, norm_sq**0.5))
+    return ret
+
+
+# Event Files #
+# ------------#
+
+
+def _crc32c_table():
+    table = list()
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _crc32c_table()
+
+
+def _masked_crc32c(data):
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc = _CRC32C_TABLE[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    crc ^= 0xFFFFFFFF
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def _varint(n):
+    ret = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if not n:
+            ret.append(byte)
+            return bytes(ret)
+        ret.append(byte | 0x80)
+
+
+def _proto_bytes(field, data):
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _event(walltime, step, file_version=None, tag=None, value=None):
+    # Event{wall_time: 1, step: 2, file_version: 3, summary: 5}
+    event = b"\x09" + struct.pack("<d", walltime) + b"\x10" + _varint(step)
+    if file_version is not None:
+        event += _proto_bytes(3, file_version.encode())
+    if tag is not None:
+        # Summary{value: 1}, Value{tag: 1, simple_value: 2}
+        summary_value = _proto_bytes(1, tag.encode()) + b"\x15"
+        summary_value += struct.pack("<f", value)
+        event += _proto_bytes(5, _proto_bytes(1, summary_value))
+    return event
+
+
+def _record(data):
+    header = struct.pack("<Q", len(data))
+    return (
+        header
+        + struct.pack("<I", _masked_crc32c(header))
+        + data
+        + struct.pack("<I", _masked_crc32c(data))
+    )
+
+
+class EventFileWriter:
+    def __init__(self, log_dir):
+        """
+        writes scalars to a tensorboard event file, used when torch is not installed.
+        Other summaries, such as images and histograms, are ignored with a warning.
+
+        :param log_dir: Directory in which to create the event file.
+        """
+        self._log_dir = log_dir
+        self._file = None
+        self._ignored = set()
+
+    def _open(self):
+        # the file is created lazily, as the log dir may be recreated after init
+        os.makedirs(self._log_dir, exist_ok=True)
+        fname = "events.out.tfevents.{}.{}".format(
+            int(time.time()), socket.gethostname()
+        )
+        self._file = open(os.path.join(self._log_dir, fname), "wb")
+        self._file.write(_record(_event(time.time(), 0, "brain.Event:2")))
+
+    def __getattr__(self, name):
+        # other summaries, such as images and histograms, are ignored with a warning
+        if not name.startswith("add_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._ignore(name)
+
+    def _ignore(self, name):
+        if name not in self._ignored:
+            self._ignored.add(name)
+            logging.warning(
+                "{} is not supported without torch, and is ignored".format(name)
+            )
+
+    def add_scalar(self, tag, scalar_value, global_step=None, walltime=None):
+        if self._file is None:
+            self._open()
+        global_step = 0 if global_step is None else global_step
+        walltime = time.time() if walltime is None else walltime
+        event = _event(walltime, global_step, tag=tag, value=scalar_value)
+        self._file.write(_record(event))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Asynchronous Writing #
+# ---------------------#
+
+
+class AsyncSummaryWriter:
+    def __init__(self, writer, max_queue_size=1024, flush_secs=10.0):
+        """
+        writes scalars to the wrapped writer from a dedicated thread, so that logging
+        never waits on the file system. Scalars are added as host values, and those
+        added with the same tag and step are coalesced. When the queue is full, the
+        oldest pending scalars are dropped.
+
+        :param writer: Writer with add_scalar, flush and close methods. Its other
+                       methods are called directly, without queueing.
+        :param max_queue_size: Maximum number of pending scalars.
+        :param flush_secs: Time between flushes of the wrapped writer, in seconds.
+        """
+        self._writer = writer
+        self._max_queue_size = max_queue_size
+        self._flush_secs = flush_secs
+        self._pending = collections.OrderedDict()
+        self._num_dropped = 0
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending or self._closed, self._flush_secs
+                )
+                if self._closed and not self._pending:
+                    return
+                batch, self._pending = self._pending, collections.OrderedDict()
+                self._writing = True
+            try:
+                for (tag, step), (value, walltime) in batch.items():
+                    self._writer.add_scalar(tag, value, step, walltime=walltime)
+                if time.monotonic() - last_flush > self._flush_secs:
+                    self._writer.flush()
+                    last_flush = time.monotonic()
+            except Exception:
+                logging.exception("failed to write summaries")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def __getattr__(self, name):
+        # other summaries, such as images and histograms, are written by the wrapped
+        # writer directly, on the calling thread
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._writer, name)
+
+    def add_scalar(self, tag, value, global_step=None):
+        self.add_scalars([(tag, value)], global_step)
+
+    def add_scalars(self, scalars, global_step=None):
+        """
+        queues (tag, value) pairs for the given step, without waiting for them to be
+        written
+        """
+        walltime = time.time()
+        with self._cond:
+            for tag, value in scalars:
+                key = (tag, global_step)
+                if key in self._pending:
+                    del self._pending[key]
+                elif len(self._pending) >= self._max_queue_size:
+                    self._pending.popitem(last=False)
+                    self._num_dropped += 1
+                self._pending[key] = (float(value), walltime)
+            self._cond.notify_all()
+
+    def flush(self):
+        """
+        waits for the pending scalars to be written, and flushes the wrapped writer
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending and not self._writing)
+            self._writer.flush()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._writer.close()
+
+    # Getters #
+    # --------#
+
+    @property
+    def num_dropped(self):
+        return self._num_dropped
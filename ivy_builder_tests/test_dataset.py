@@ -7,7 +7,8 @@ import pytest
 import numpy as np
 
 # local
-from ivy_builder.dataset import Dataset
+from ivy_builder.dataset import Cache, Dataset, DatasetExecutor
+from ivy_builder.sampler import SequentialSampler, RandomSampler, WeightedSampler
 
 # ToDo: find way to get multiprocessing working properly for jax and mxnet
 
@@ -284,6 +285,34 @@ class TestBatch:
         self._dataset.close()
         del self._dataset
 
+    def test_preallocated(self, dev_str, f, fw):
+        x = [ivy.array([float(i)] * 4) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(dataset_container, "base", dataset_container.cont_shape[0])
+        loaded = list()
+
+        def load_together(cont):
+            # all items of the slice are written into one array
+            array = np.stack([ivy.to_numpy(item) for item in cont.x]) * 2
+            loaded.append(array)
+            return ivy.Container(x=list(array))
+
+        dataset = dataset.map("loaded", load_together, elementwise_query_fn=False)
+        dataset = dataset.batch("batched", 3)
+
+        for i in range(3):
+            batch = dataset[i]
+            assert np.allclose(
+                ivy.to_numpy(batch.x), 2 * np.arange(3 * i, 3 * i + 3)[:, None]
+            )
+            if fw == "numpy":
+                # batched as a view of the loaded array, without copying
+                assert np.shares_memory(ivy.to_native(batch.x), loaded[-1])
+
+        # close
+        dataset.close()
+        del dataset
+
 
 class TestUnbatch:
     def _init(self, array_shape, num_processes):
@@ -387,6 +416,27 @@ class TestUnbatch:
         self._dataset.close()
         del self._dataset
 
+    @pytest.mark.parametrize("batch_sizes", [None, 3, [3, 3, 3]])
+    def test_lazy_sizes(self, dev_str, f, batch_sizes):
+        x = [ivy.array([float(i)]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(dataset_container, "base", 9, cache_size=0)
+        batched = dataset.batch("batched", 3)
+        unbatched = batched.unbatch("unbatched", batch_sizes=batch_sizes)
+
+        # the sizes are known without loading any batch
+        assert batched.stats().batched.num_calls == 0
+        assert unbatched.size == 9
+        assert np.allclose(ivy.to_numpy(unbatched[8].x), np.array([8.0]))
+        assert [float(ivy.to_numpy(v)[0]) for v in unbatched[2:7].x] == [
+            2.0,
+            3.0,
+            4.0,
+            5.0,
+            6.0,
+        ]
+        unbatched.close()
+
 
 class TestUnbatchAndBatch:
     def _init(self, num_processes):
@@ -684,6 +734,120 @@ class TestShuffle:
         self._dataset.close()
         del self._dataset
 
+    @pytest.mark.parametrize("shuffle_buffer_size", [3, 4, 9])
+    def test_index_permutation(self, dev_str, f, shuffle_buffer_size):
+        x = [ivy.array([float(i)]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        base = Dataset(dataset_container, "base", 9, cache_size=0)
+        datasets = [
+            base.shuffle("shuffled", shuffle_buffer_size, seed=seed)
+            for seed in [0, 0, None]
+        ]
+        vals = [
+            [float(ivy.to_numpy(v)[0]) for v in dataset[0:9].x] for dataset in datasets
+        ]
+
+        # every buffer holds a permutation of its own elements
+        for i in range(0, 9, shuffle_buffer_size):
+            block = list(range(i, min(i + shuffle_buffer_size, 9)))
+            for val in vals:
+                assert sorted(val[i : i + shuffle_buffer_size]) == block
+
+        # seeded shuffles are reproducible
+        assert vals[0] == vals[1]
+
+        # only the queried elements are fetched from upstream
+        datasets[0][2:4]
+        assert base.stats().base.num_items == 3 * 9 + 2
+        for dataset in datasets:
+            dataset.close()
+
+    def test_epochs(self, dev_str, f):
+        x = [ivy.array([float(i)]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        base = Dataset(dataset_container, "base", 9, cache_size=0)
+        shuffled = base.shuffle("shuffled", 9, seed=0)
+        vals = [float(ivy.to_numpy(v)[0]) for v in shuffled[0:27].x]
+        epochs = [vals[i : i + 9] for i in range(0, 27, 9)]
+
+        # every epoch is a different permutation of all elements
+        for epoch in epochs:
+            assert sorted(epoch) == [float(i) for i in range(9)]
+        assert epochs[0] != epochs[1]
+        assert epochs[1] != epochs[2]
+
+        # which only depends on the seed and the epoch
+        reshuffled = base.shuffle("reshuffled", 9, seed=0)
+        assert [float(ivy.to_numpy(v)[0]) for v in reshuffled[9:18].x] == epochs[1]
+        shuffled.close()
+        reshuffled.close()
+
+    def test_unseeded(self, dev_str, f):
+        x = [ivy.array([float(i)]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        base = Dataset(dataset_container, "base", 9, cache_size=0)
+        shuffled = base.shuffle("shuffled", 4)
+        vals = [float(ivy.to_numpy(v)[0]) for v in shuffled[0:9].x]
+
+        # permutations evicted from the cache are the same when queried again
+        shuffled[45:54]
+        assert [float(ivy.to_numpy(v)[0]) for v in shuffled[0:9].x] == vals
+        assert sorted(vals) == [float(i) for i in range(9)]
+        shuffled.close()
+
+    def test_cycle_for_debugging(self, dev_str, f):
+        x = [ivy.array([float(i)]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        base = Dataset(dataset_container, "base", 9, cache_size=0)
+        shuffled = base.shuffle("shuffled", 4, seed=0)
+
+        # the positions span all epochs, but one cycle ends after the first epoch
+        assert shuffled.size == 9 * 2**16
+        shuffled.cycle_for_debugging()
+        assert shuffled.stats().shuffled.num_items == 9
+        shuffled.close()
+
+
+class TestSample:
+    @pytest.mark.parametrize(
+        "sampler_class", [SequentialSampler, RandomSampler, WeightedSampler]
+    )
+    def test_epochs(self, dev_str, f, sampler_class):
+        x = [ivy.array([float(i)]) for i in range(6)]
+        dataset_container = ivy.Container({"x": x})
+        base = Dataset(dataset_container, "base", 6, cache_size=0)
+
+        def make_sampler():
+            if sampler_class is WeightedSampler:
+                return WeightedSampler([1.0, 1.0, 1.0, 1.0, 0.0, 0.0], 4, seed=0)
+            return sampler_class(6, 4, seed=0)
+
+        sampler = make_sampler()
+        sampled = base.sample("sampled", sampler)
+        vals = [float(ivy.to_numpy(v)[0]) for v in sampled[0:12].x]
+
+        # each epoch only depends on the seed and the epoch
+        for epoch in range(3):
+            assert vals[epoch * 4 : epoch * 4 + 4] == [
+                float(i) for i in sampler.epoch_idxs(epoch)
+            ]
+        assert np.array_equal(make_sampler().epoch_idxs(2), sampler.epoch_idxs(2))
+        if sampler_class is SequentialSampler:
+            assert vals[0:8] == [0.0, 1.0, 2.0, 3.0] * 2
+        elif sampler_class is RandomSampler:
+            assert len(set(vals[0:4])) == 4
+        else:
+            assert all([v < 4 for v in vals])
+
+        # single queries agree with the slices
+        assert float(ivy.to_numpy(sampled[5].x)[0]) == vals[5]
+
+        # one cycle ends after the first epoch
+        assert sampled.size == 4 * 2**16
+        sampled.cycle_for_debugging()
+        assert sampled.stats().sampled.num_items == 12 + 1 + 4
+        sampled.close()
+
 
 class TestPrefetch:
     def _init(self, array_shape, num_processes):
@@ -757,3 +921,319 @@ class TestPrefetch:
         del self._dataset_wo_prefetch
         self._dataset_w_prefetch.close()
         del self._dataset_w_prefetch
+
+
+class TestCache:
+    def test_lru_eviction(self, dev_str, f):
+        cache = Cache(2)
+        cache[0] = ivy.Container(x=ivy.array([0.0]))
+        cache[1] = ivy.Container(x=ivy.array([1.0]))
+        assert np.allclose(ivy.to_numpy(cache[0].x), 0.0)
+        cache[2] = ivy.Container(x=ivy.array([2.0]))
+        assert 0 in cache
+        assert 1 not in cache
+        assert 2 in cache
+        stats = cache.stats
+        assert stats.hits == 1
+        assert stats.evictions == 1
+        assert stats.size == 2
+
+    def test_byte_budget(self, dev_str, f):
+        cache = Cache(100, max_bytes=3 * 4 * 4)
+        for i in range(5):
+            cache[i] = ivy.Container(x=ivy.array([float(i)] * 4, dtype="float32"))
+        assert len(cache) == 3
+        assert cache.num_bytes == 3 * 4 * 4
+        assert cache.stats.evictions == 2
+        assert 0 not in cache and 1 not in cache
+        assert all([i in cache for i in range(2, 5)])
+
+    def test_dataset_cache_stats(self, dev_str, f):
+        x = [ivy.reshape(ivy.array(i), [1]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            cache_size=9,
+        )
+        dataset[0:3]
+        dataset[1:4]
+        stats = dataset.cache_stats
+        assert stats.misses == 4
+        assert stats.hits == 2
+        assert stats.size == 4
+        dataset.close()
+
+    def test_dataset_cached_ranges(self, dev_str, f):
+        x = [ivy.reshape(ivy.array(i), [1]) for i in range(9)]
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            cache_size=9,
+        )
+        dataset[0:3]
+        dataset[3:6]
+        item = dataset[1:7]
+        assert len(item.x) == 6
+        for i in range(6):
+            assert np.allclose(ivy.to_numpy(item.x[i]), np.array([i + 1]))
+        assert np.allclose(ivy.to_numpy(dataset[4].x), np.array([4]))
+        stats = dataset.cache_stats
+        assert stats.misses == 7
+        assert stats.hits == 6
+        dataset.close()
+
+
+class TestSharedMemoryTransport:
+    def _init(self, num_processes):
+        x = [ivy.array([float(i)] * 4) for i in range(10)]
+        self._x = x
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            numpy_loading=True,
+        )
+        self._dataset = dataset.map(
+            "doubled",
+            lambda cont: cont * 2,
+            num_processes=num_processes,
+            transport="shared_memory",
+        )
+
+    @pytest.mark.parametrize("num_processes", [1, 2])
+    def test_slice(self, dev_str, f, num_processes):
+        self._init(num_processes)
+
+        for i in range(6):
+            start = (i * 3) % 10
+            item = self._dataset[start : start + 3]
+            assert len(item.x) == 3
+            for j in range(3):
+                assert np.allclose(
+                    ivy.to_numpy(item.x[j]),
+                    2 * ivy.to_numpy(self._x[(start + j) % 10]),
+                )
+
+        # close
+        self._dataset.close()
+        del self._dataset
+
+    @pytest.mark.parametrize("num_processes", [2])
+    def test_held_items(self, dev_str, f, num_processes):
+        self._init(num_processes)
+
+        # items held across further reads are not overwritten by recycled slots
+        held = [self._dataset[i] for i in range(8)]
+        for i in range(8, 20):
+            self._dataset[i]
+        for i, item in enumerate(held):
+            assert np.allclose(
+                ivy.to_numpy(item.x[0]), 2 * ivy.to_numpy(self._x[i % 10])
+            )
+
+        # close
+        self._dataset.close()
+        del self._dataset
+
+    @pytest.mark.parametrize("num_processes", [2])
+    def test_slot_release(self, dev_str, f, num_processes):
+        self._init(num_processes)
+        batched = self._dataset.batch("batched", 2)
+
+        # the slots are given back once each batch is stacked, so more batches than
+        # slots are read without falling back to pickling
+        for i in range(10):
+            batch = batched[i]
+            assert np.allclose(ivy.to_numpy(batch.x[0][1]), 2 * (2 * i + 1) % 20)
+
+        # items read through shared memory are read-only views of the slot
+        item = self._dataset[0:2]
+        assert not item.x[0].flags.writeable
+        assert np.allclose(ivy.to_numpy(item.x[1]), 2 * ivy.to_numpy(self._x[1]))
+
+        # close
+        batched.close()
+        del batched
+        del self._dataset
+
+
+class TestExecutor:
+    def _init(self, stage_limits):
+        x = [ivy.array([float(i)]) for i in range(10)]
+        self._x = x
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            num_processes=2,
+        )
+        dataset = dataset.map("doubled", lambda cont: cont * 2, num_processes=3)
+        self._dataset = dataset.batch("batched", 2, num_processes=2)
+        self._executor = DatasetExecutor(self._dataset, 2, stage_limits)
+
+    @pytest.mark.parametrize("stage_limits", [None, {"doubled": 1}])
+    def test_slice(self, dev_str, f, stage_limits):
+        self._init(stage_limits)
+
+        if stage_limits is None:
+            assert self._executor.stage_limits == {
+                "batched": 2,
+                "doubled": 2,
+                "base": 2,
+            }
+        else:
+            assert self._executor.stage_limits["doubled"] == 1
+
+        for i in range(4):
+            item = self._dataset[i : i + 2]
+            assert len(item.x) == 2
+            for j in range(2):
+                idx = ((i + j) * 2) % 10
+                assert np.allclose(
+                    ivy.to_numpy(item.x[j]),
+                    np.array([[2.0 * idx], [2.0 * ((idx + 1) % 10)]]),
+                )
+
+        # noinspection PyProtectedMember
+        assert not self._dataset._has_workers
+
+        # close
+        self._executor.close()
+        self._dataset.close()
+        del self._dataset
+
+
+def _wait_for(condition_fn, timeout=10.0):
+    # the timeout only guards against hanging, the checks do not depend on timing
+    end_time = time.perf_counter() + timeout
+    while not condition_fn():
+        assert time.perf_counter() < end_time
+        time.sleep(0.001)
+
+
+class TestThreadPrefetch:
+    def _init(self, depth):
+        x = [ivy.array([float(i)]) for i in range(10)]
+        self._x = x
+        self._fetched = list()
+
+        def record_fn(cont):
+            self._fetched.append(int(ivy.to_numpy(cont.x)[0]))
+            return cont
+
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            with_caching=False,
+            cache_size=0,
+        )
+        dataset = dataset.map("record", record_fn)
+        self._dataset = dataset.prefetch("prefetch", depth=depth, backend="thread")
+
+    # noinspection PyStatementEffect
+    @pytest.mark.parametrize("depth", [1, 3])
+    def test_single(self, dev_str, f, depth):
+        self._init(depth)
+
+        for i in range(6):
+            item = self._dataset[i]
+            assert np.allclose(ivy.to_numpy(item.x), np.array([float(i)]))
+            # depth items are queued ahead of the consumer, and one more is in flight
+            _wait_for(lambda: i + depth + 1 in self._fetched)
+            assert max(self._fetched) <= i + depth + 1
+
+        # non-sequential queries restart the prefetching
+        assert np.allclose(ivy.to_numpy(self._dataset[5].x), np.array([5.0]))
+        assert np.allclose(ivy.to_numpy(self._dataset[6].x), np.array([6.0]))
+
+        # close
+        self._dataset.close()
+        del self._dataset
+
+
+class TestDevicePrefetch:
+    def _init(self, num_buffers):
+        x = [ivy.array([float(i)]) for i in range(10)]
+        self._copied = list()
+
+        def copy_fn(cont, dev_str):
+            self._copied.append(float(ivy.to_numpy(cont.x)[0]))
+            return cont
+
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            with_caching=False,
+            cache_size=0,
+        )
+        self._dataset = dataset.to_dev(
+            "to_dev", "cpu", num_buffers=num_buffers, copy_fn=copy_fn
+        )
+
+    # noinspection PyStatementEffect
+    @pytest.mark.parametrize("num_buffers", [1, 2])
+    def test_single(self, dev_str, f, num_buffers):
+        self._init(num_buffers)
+
+        for i in range(6):
+            item = self._dataset[i]
+            assert np.allclose(ivy.to_numpy(item.x), np.array([float(i)]))
+            # copies run ahead of the consumer by num_buffers items, plus one in flight
+            _wait_for(lambda: float(i + num_buffers + 1) in self._copied)
+            assert max(self._copied) <= i + num_buffers + 1
+
+        # the copies are made in order
+        num_copied = len(self._copied)
+        assert self._copied == [float(i) for i in range(num_copied)]
+
+        # close
+        self._dataset.close()
+        del self._dataset
+
+
+class TestStats:
+    def _init(self, num_processes):
+        x = [ivy.array([float(i)] * 4, dtype="float32") for i in range(8)]
+        dataset_container = ivy.Container({"x": x})
+        dataset = Dataset(
+            dataset_container,
+            "base",
+            dataset_container.cont_shape[0],
+            numpy_loading=True,
+        )
+        dataset = dataset.map("doubled", lambda cont: cont * 2, num_processes)
+        self._dataset = dataset.batch("batched", 2)
+
+    @pytest.mark.parametrize("num_processes", [1, 2])
+    def test_stats(self, dev_str, f, num_processes):
+        self._init(num_processes)
+        self._dataset[0]
+        self._dataset[1]
+        stats = self._dataset.stats()
+        assert set(stats.keys()) == {"batched", "doubled", "base"}
+        assert stats.batched.num_calls == 2
+        assert stats.batched.num_items == 2
+        assert stats.batched.num_bytes == 2 * 2 * 4 * 4
+        assert stats.batched.trans_time > 0
+        assert stats.batched.items_per_second > 0
+        assert stats.doubled.num_calls == 2
+        assert stats.doubled.num_items == 4
+        if num_processes == 1:
+            # the map stage runs in this process
+            assert stats.doubled.trans_time > 0
+            assert stats.base.num_items == 4
+        else:
+            # the map stage runs in its workers, which this process waits on
+            assert stats.doubled.queue_wait_time > 0
+            assert stats.base.num_calls == 0
+        self._dataset.close()
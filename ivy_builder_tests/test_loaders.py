@@ -2,7 +2,9 @@
 import os
 import ivy
 import json
+import pickle
 import pytest
+import shutil
 import numpy as np
 
 # local
@@ -10,6 +12,7 @@ from ivy_builder.specs.dataset_dirs import DatasetDirs
 from ivy_builder.specs.dataset_spec import DatasetSpec
 from ivy_builder.data_loaders.seq_data_loader import SeqDataLoader
 from ivy_builder.data_loaders.specs.seq_data_loader_spec import SeqDataLoaderSpec
+from scripts.pack_dataset_images import main as pack_images_main
 
 
 def test_seq_loader_multi_dev(dev_str, f):
@@ -81,7 +84,7 @@ def test_seq_loader_multi_dev(dev_str, f):
     del data_loader
 
 
-@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic"])
+@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic", "mmap"])
 @pytest.mark.parametrize("array_mode", ["hdf5", "pickled"])
 @pytest.mark.parametrize("with_prefetching", [True, False])
 @pytest.mark.parametrize("sequence_lengths", [1, 2])
@@ -151,7 +154,7 @@ def test_seq_loader_fixed_seq_len(
     del data_loader
 
 
-@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic"])
+@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic", "mmap"])
 @pytest.mark.parametrize("array_mode", ["hdf5", "pickled"])
 @pytest.mark.parametrize("with_prefetching", [True, False])
 @pytest.mark.parametrize("shuffle_buffer_size", [0, 2])
@@ -705,3 +708,736 @@ def test_seq_loader_wo_cont_load(dev_str, f, with_prefetching, shuffle_buffer_si
     del train_data_loader
     valid_data_loader.close()
     del valid_data_loader
+
+
+@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic"])
+@pytest.mark.parametrize("prefetch_depth", [1, 3])
+def test_seq_loader_thread_prefetching(dev_str, f, container_load_mode, prefetch_depth):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs, sequence_lengths=2, cont_fname_template="%06d_%06d.json"
+    )
+    data_loader_spec = SeqDataLoaderSpec(
+        dataset_spec,
+        batch_size=1,
+        window_size=1,
+        starting_idx=0,
+        num_sequences=1,
+        container_load_mode=container_load_mode,
+        array_mode="hdf5",
+        array_strs=["array"],
+        float_strs=["depth"],
+        uint8_strs=["rgb"],
+        with_prefetching=True,
+        prefetch_backend="thread",
+        prefetch_depth=prefetch_depth,
+        shuffle_buffer_size=0,
+        preshuffle_data=False,
+    )
+
+    # data loader
+    data_loader = SeqDataLoader(data_loader_spec)
+
+    # testing
+    for i in range(5):
+        # get training batch
+        batch = data_loader.get_next_batch()
+
+        # test cardinality
+        assert batch.actions.shape == (1, 1, 6)
+        assert batch.observations.image.ego.ego_cam_px.rgb.shape == (1, 1, 32, 32, 3)
+        assert batch["array"].data.shape == (1, 1, 3)
+
+        # test values
+        assert batch.seq_info.length[0, 0] == 2
+        assert batch.seq_info.idx[0, 0] == i % 2
+
+    # delete
+    data_loader.close()
+    del data_loader
+
+
+@pytest.mark.parametrize("container_load_mode", ["dynamic", "mmap"])
+@pytest.mark.parametrize("window_size", [1, 2])
+def test_seq_loader_img_shards(dev_str, f, container_load_mode, window_size):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    # pack the images into shards
+    shards_dir = os.path.join(ds_dir, "img_shards")
+    pack_images_main(os.path.join(ds_dir, "containers"), shards_dir)
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    try:
+        for img_mode in ["files", "shards"]:
+            data_loader_spec = SeqDataLoaderSpec(
+                dataset_spec,
+                batch_size=2,
+                window_size=window_size,
+                starting_idx=0,
+                num_sequences=3,
+                container_load_mode=container_load_mode,
+                array_mode="pickled",
+                array_strs=["array"],
+                float_strs=["depth"],
+                uint8_strs=["rgb"],
+                img_mode=img_mode,
+                with_prefetching=False,
+                shuffle_buffer_size=0,
+                preshuffle_data=False,
+            )
+            data_loaders.append(SeqDataLoader(data_loader_spec))
+
+        # testing
+        for i in range(5):
+            batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+            shards_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+            assert shards_batch.observations.image.ego.ego_cam_px.rgb.shape == (
+                2,
+                window_size,
+                32,
+                32,
+                3,
+            )
+            assert ivy.Container.cont_all_true(
+                ivy.Container.cont_multi_map(
+                    lambda xs, _: np.allclose(xs[0], xs[1]), [batch, shards_batch]
+                )
+            )
+    finally:
+        # delete
+        for data_loader in data_loaders:
+            data_loader.close()
+        shutil.rmtree(shards_dir)
+
+
+@pytest.mark.parametrize("frame_cache_max_bytes", [None, 20000])
+def test_seq_loader_frame_cache(dev_str, f, frame_cache_max_bytes):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    cont_dir = os.path.join(ds_dir, "containers")
+    dataset_dirs = DatasetDirs(dataset_dir=ds_dir, containers_dir=cont_dir)
+
+    # unique images of the first three sequences
+    img_paths = set()
+    for cont_fname in os.listdir(cont_dir):
+        if int(cont_fname.split("_")[0]) > 2:
+            continue
+        cont = ivy.Container.cont_from_disk_as_json(os.path.join(cont_dir, cont_fname))
+        for key_chain, value in zip(
+            cont.cont_all_key_chains(), cont.cont_to_flat_list()
+        ):
+            if "rgb" in key_chain or "depth" in key_chain:
+                img_paths.add(os.path.abspath(os.path.join(cont_dir, value)))
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for frame_cache_size in [0, 1000]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=4,
+            window_size=2,
+            starting_idx=0,
+            num_sequences=3,
+            num_workers=1,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            frame_cache_size=frame_cache_size,
+            frame_cache_max_bytes=frame_cache_max_bytes,
+            with_prefetching=False,
+            shuffle_buffer_size=0,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # testing
+    for i in range(3):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        cached_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.allclose(xs[0], xs[1]), [batch, cached_batch]
+            )
+        )
+
+    # 3 batches of 4 windows of 2 frames, with 8 image key chains
+    assert data_loaders[0].num_frame_decodes == 3 * 4 * 2 * 8
+    assert data_loaders[0].frame_cache_stats is None
+    stats = data_loaders[1].frame_cache_stats
+    assert stats.misses == data_loaders[1].num_frame_decodes
+    if frame_cache_max_bytes is None:
+        # every unique frame is decoded exactly once
+        assert data_loaders[1].num_frame_decodes == len(img_paths)
+        assert stats.evictions == 0
+    else:
+        assert stats.num_bytes <= frame_cache_max_bytes
+        assert stats.evictions > 0
+        assert data_loaders[1].num_frame_decodes > len(img_paths)
+
+    # the lock is dropped when pickling, and recreated when unpickling
+    state = data_loaders[1].__getstate__()
+    assert state["_frame_cache_lock"] is None
+    pickle.dumps(state["_frame_cache"])
+    unpickled = SeqDataLoader.__new__(SeqDataLoader)
+    unpickled.__setstate__(state)
+    assert unpickled._frame_cache_lock.acquire(blocking=False)
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+
+@pytest.mark.parametrize("decode_threads", [2, 4])
+@pytest.mark.parametrize("window_size", [1, 2])
+def test_seq_loader_decode_threads(dev_str, f, decode_threads, window_size):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for threads in [0, decode_threads]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=window_size,
+            starting_idx=0,
+            num_sequences=3,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            decode_threads=threads,
+            with_prefetching=False,
+            shuffle_buffer_size=0,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # testing
+    for i in range(5):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        threaded_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+        assert threaded_batch.observations.image.ego.ego_cam_px.depth.shape == (
+            2,
+            window_size,
+            32,
+            32,
+        )
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.array_equal(xs[0], xs[1]), [batch, threaded_batch]
+            )
+        )
+
+    # the pool is dropped when pickling, and shut down when closing
+    assert data_loaders[1].__getstate__()["_decode_pool"] is None
+    decode_pool = data_loaders[1]._decode_pool
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+    if decode_pool is not None:
+        with pytest.raises(RuntimeError):
+            decode_pool.submit(lambda: None)
+
+
+@pytest.mark.parametrize("container_load_mode", ["preload", "dynamic", "mmap"])
+@pytest.mark.parametrize("window_size", [1, 2])
+def test_seq_loader_intern_paths(dev_str, f, container_load_mode, window_size):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for intern_paths in [False, True]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=window_size,
+            starting_idx=0,
+            num_sequences=3,
+            container_load_mode=container_load_mode,
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            intern_paths=intern_paths,
+            with_prefetching=False,
+            shuffle_buffer_size=0,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # unloaded strings are still returned as uint8 arrays
+    depth_fpath = ivy.to_numpy(
+        data_loaders[1]._uninterned(
+            ivy.array([data_loaders[1]._intern_str("../depth/a.png")], dtype="int32")
+        )
+    )
+    assert depth_fpath.dtype == np.uint8
+    assert bytearray(depth_fpath[0].tolist()).decode() == "../depth/a.png"
+
+    # strings of different lengths are zero padded to the longest
+    fpaths = ["../depth/a.png", "../depth/abc.png", "a.png"]
+    ids = [data_loaders[1]._intern_str(fpath) for fpath in fpaths]
+    padded = ivy.to_numpy(data_loaders[1]._uninterned(ivy.array([ids], dtype="int32")))
+    assert padded.shape == (1, 3, len("../depth/abc.png"))
+    for fpath, row in zip(fpaths, padded[0]):
+        assert bytes(row.tolist()).rstrip(b"\x00").decode() == fpath
+
+    # testing
+    for i in range(5):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        interned_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.array_equal(xs[0], xs[1]), [batch, interned_batch]
+            )
+        )
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+
+@pytest.mark.parametrize("intern_paths", [False, True])
+@pytest.mark.parametrize("window_size", [1, 2])
+def test_seq_loader_json_schema_parsing(dev_str, f, intern_paths, window_size):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for json_schema_parsing in [False, True]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=window_size,
+            starting_idx=0,
+            num_sequences=3,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            intern_paths=intern_paths,
+            json_schema_parsing=json_schema_parsing,
+            with_prefetching=False,
+            shuffle_buffer_size=0,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # testing
+    for i in range(5):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        schema_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.array_equal(xs[0], xs[1]), [batch, schema_batch]
+            )
+        )
+
+    # containers which do not match the schema are parsed generically
+    json_strs = ivy.Container(
+        {"json_str": [json.dumps({"a": [[1.0, 2.0]], "b": {"c": [[3.0]]}}), ""]}
+    )
+    parsed = ivy.to_numpy(data_loaders[1]._parse_json_strings_w_schema(json_strs))
+    assert np.array_equal(parsed.a, np.array([1.0, 2.0, 1.0, 2.0]))
+    assert np.array_equal(parsed.b.c, np.array([3.0, 3.0]))
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+
+@pytest.mark.parametrize("intern_paths", [False, True])
+@pytest.mark.parametrize("shuffle_buffer_size", [0, 2])
+def test_seq_loader_worker_allocation(dev_str, f, intern_paths, shuffle_buffer_size):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for worker_allocation in ["fixed", "latency"]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=4,
+            window_size=2,
+            starting_idx=0,
+            num_sequences=4,
+            num_workers=4,
+            worker_allocation=worker_allocation,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            intern_paths=intern_paths,
+            with_prefetching=False,
+            shuffle_buffer_size=shuffle_buffer_size,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # the latencies are measured while loading the first two batches, after which the
+    # pipeline is rebuilt, without changing the batches
+    allocated_loader = data_loaders[1]
+    assert allocated_loader.stage_latencies is None
+    for _ in range(4):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        allocated_batch = ivy.to_numpy(allocated_loader.get_next_batch())
+        assert allocated_batch.cont_shape[0:2] == [4, 2]
+        if shuffle_buffer_size > 0:
+            # each data loader draws its own shuffle seed
+            continue
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.array_equal(xs[0], xs[1]),
+                [batch, allocated_batch],
+            )
+        )
+
+    # allocation
+    assert allocated_loader.stage_latencies["parsed_json"] > 0
+    num_workers = allocated_loader._num_workers.cont_to_dict()
+    assert SeqDataLoader._num_stage_processes(num_workers) <= 4
+    if intern_paths:
+        assert all([num_workers[n] == 1 for n in ["parsed_json", "windowed"]])
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+    # with fixed allocation, the json stages are given the workers left over by the
+    # loaded data stage
+    data_loader_spec = SeqDataLoaderSpec(
+        dataset_spec,
+        batch_size=2,
+        window_size=2,
+        starting_idx=0,
+        num_sequences=4,
+        num_workers=10,
+        container_load_mode="dynamic",
+        array_mode="pickled",
+        array_strs=["array"],
+        float_strs=["depth"],
+        uint8_strs=["rgb"],
+        intern_paths=intern_paths,
+        with_prefetching=False,
+        shuffle_buffer_size=shuffle_buffer_size,
+        preshuffle_data=False,
+    )
+    data_loader = SeqDataLoader(data_loader_spec)
+    num_workers = data_loader._num_workers.cont_to_dict()
+    assert num_workers["loaded_data"] == 2
+    if intern_paths:
+        assert num_workers["loaded_json"] == 4 and num_workers["parsed_json"] == 1
+    else:
+        assert num_workers["loaded_json"] == 2 and num_workers["parsed_json"] == 2
+    assert SeqDataLoader._num_stage_processes(num_workers) <= 10
+    batch = ivy.to_numpy(data_loader.get_next_batch())
+    assert batch.cont_shape[0:2] == [2, 2]
+    data_loader.close()
+
+    # the allocation mode does not change the preshuffled sequence order
+    seq_orders = list()
+    next_random = list()
+    for worker_allocation in ["fixed", "latency"]:
+        np.random.seed(0)
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=4,
+            window_size=2,
+            starting_idx=0,
+            num_sequences=4,
+            num_workers=4,
+            worker_allocation=worker_allocation,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            intern_paths=intern_paths,
+            with_prefetching=False,
+            shuffle_buffer_size=shuffle_buffer_size,
+            preshuffle_data=True,
+        )
+        data_loader = SeqDataLoader(data_loader_spec)
+        seq_orders.append(data_loader.state_dict()["seq_order"])
+        next_random.append(np.random.randint(2**31))
+        data_loader.close()
+    assert seq_orders[0] == seq_orders[1]
+    assert next_random[0] == next_random[1]
+
+
+@pytest.mark.parametrize("shuffle_seed", [None, 1])
+def test_seq_loader_shuffle_seed(dev_str, f, shuffle_seed):
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for num_workers in [1, 4]:
+        # with an unspecified shuffle seed, it is drawn from the global random state
+        np.random.seed(0)
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=1,
+            starting_idx=0,
+            num_sequences=4,
+            num_workers=num_workers,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            with_prefetching=False,
+            shuffle_buffer_size=3,
+            shuffle_seed=shuffle_seed,
+            preshuffle_data=False,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+    assert data_loaders[1]._num_workers.loaded_data == 2
+
+    # every loaded data worker shuffles the same way, across several epochs
+    for _ in range(12):
+        batch = ivy.to_numpy(data_loaders[0].get_next_batch())
+        multi_worker_batch = ivy.to_numpy(data_loaders[1].get_next_batch())
+        assert ivy.Container.cont_all_true(
+            ivy.Container.cont_multi_map(
+                lambda xs, _: np.array_equal(xs[0], xs[1]),
+                [batch, multi_worker_batch],
+            )
+        )
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+
+@pytest.mark.parametrize("sampler", ["sequential", "random", "weighted"])
+@pytest.mark.parametrize("with_prefetching", [False, True])
+@pytest.mark.parametrize("prefetch_backend", ["thread", "process"])
+def test_seq_loader_sampler(dev_str, f, sampler, with_prefetching, prefetch_backend):
+    # seed
+    ivy.seed(seed_value=0)
+    np.random.seed(0)
+
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for num_workers in [1, 2]:
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=2,
+            starting_idx=0,
+            num_sequences=4,
+            num_workers=num_workers,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            sampler=sampler,
+            sampler_seed=1,
+            with_prefetching=with_prefetching,
+            prefetch_backend=prefetch_backend,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    # 6 windows make 3 batches per epoch
+    data_loader = data_loaders[0]
+    assert data_loader.batches_per_epoch == 3
+
+    def seq_idxs(batch):
+        seq_info = ivy.to_numpy(batch.seq_info)
+        return (seq_info.seq_idx * 10 + seq_info.idx).reshape(-1).tolist()
+
+    # every worker count produces the same batches
+    batches = [[seq_idxs(dl.get_next_batch()) for _ in range(7)] for dl in data_loaders]
+    assert batches[0] == batches[1]
+    assert data_loader.epoch == 2
+
+    # epochs can be replayed exactly, also after loading batches of other epochs
+    data_loader.set_epoch(1)
+    assert data_loader.epoch == 1
+    assert [seq_idxs(data_loader.get_next_batch()) for _ in range(3)] == batches[0][3:6]
+    if sampler == "sequential":
+        assert batches[0][0:3] == batches[0][3:6]
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
+
+
+@pytest.mark.parametrize("sampler", [None, "random"])
+@pytest.mark.parametrize("with_prefetching", [False, True])
+@pytest.mark.parametrize("shuffle_buffer_size", [0, 3])
+def test_seq_loader_state_dict(
+    dev_str, f, sampler, with_prefetching, shuffle_buffer_size
+):
+    # dataset dir
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    ds_dir = os.path.join(current_dir, "dataset")
+    dataset_dirs = DatasetDirs(
+        dataset_dir=ds_dir, containers_dir=os.path.join(ds_dir, "containers")
+    )
+
+    dataset_spec = DatasetSpec(
+        dataset_dirs,
+        sequence_lengths=[2, 3, 2, 3, 3, 1],
+        cont_fname_template="%06d_%06d.json",
+    )
+    data_loaders = list()
+    for seed in [0, 1]:
+        # the sequences of each data loader are preshuffled differently
+        np.random.seed(seed)
+        data_loader_spec = SeqDataLoaderSpec(
+            dataset_spec,
+            batch_size=2,
+            window_size=1,
+            starting_idx=0,
+            num_sequences=4,
+            container_load_mode="dynamic",
+            array_mode="pickled",
+            array_strs=["array"],
+            float_strs=["depth"],
+            uint8_strs=["rgb"],
+            sampler=sampler,
+            sampler_seed=seed,
+            with_prefetching=with_prefetching,
+            preshuffle_data=True,
+            shuffle_buffer_size=shuffle_buffer_size,
+        )
+        data_loaders.append(SeqDataLoader(data_loader_spec))
+
+    def seq_idxs(batch):
+        seq_info = ivy.to_numpy(batch.seq_info)
+        return (seq_info.seq_idx * 10 + seq_info.idx).reshape(-1).tolist()
+
+    # save the state part way through
+    data_loader = data_loaders[0]
+    for _ in range(3):
+        data_loader.get_next_batch()
+    state = data_loader.state_dict()
+    assert state["counter"] == 3
+    if shuffle_buffer_size > 0:
+        # the shuffle seed, drawn from the differently seeded global random states
+        assert state["shuffle_seed"] != data_loaders[1].state_dict()["shuffle_seed"]
+    batches = [seq_idxs(data_loader.get_next_batch()) for _ in range(4)]
+
+    # the other data loader resumes with the same batches
+    resumed_loader = data_loaders[1]
+    resumed_loader.get_first_batch()
+    resumed_loader.load_state_dict(state)
+    assert resumed_loader.state_dict() == state
+    assert [seq_idxs(resumed_loader.get_next_batch()) for _ in range(4)] == batches
+
+    # delete
+    for data_loader in data_loaders:
+        data_loader.close()
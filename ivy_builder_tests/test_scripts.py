@@ -3,9 +3,13 @@ import json
 import os
 import ivy
 import shutil
+import tempfile
+import numpy as np
 
 # local
+from ivy_builder.array_store import load_arrays
 from scripts.format_dataset_containers import main
+from scripts.compile_dataset_containers import main as compile_main
 
 
 # Tests #
@@ -48,3 +52,34 @@ def test_format_dataset_containers(dev_str):
         )
     shutil.rmtree(cont_to_format_dir)
     shutil.copytree(orig_cont_dir, cont_to_format_dir)
+
+
+def test_compile_dataset_containers(dev_str):
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    cont_dir = os.path.join(this_dir, "dataset/containers")
+    with tempfile.TemporaryDirectory() as out_dir:
+        compile_main(cont_dir, out_dir)
+        assert sorted(os.listdir(out_dir)) == [
+            "{:06d}.mmap".format(i) for i in range(6)
+        ]
+        for seq_idx, num_frames in enumerate([2, 3, 2, 3, 3, 1]):
+            arrays, meta = load_arrays(
+                os.path.join(out_dir, "{:06d}.mmap".format(seq_idx))
+            )
+            assert meta["num_frames"] == num_frames
+            for win_idx in range(num_frames):
+                cont = ivy.Container.cont_from_disk_as_json(
+                    os.path.join(
+                        cont_dir, "{:06d}_{:06d}.json".format(seq_idx, win_idx)
+                    )
+                )
+                assert np.allclose(
+                    arrays["actions"][win_idx], np.array(cont.actions[0], np.float32)
+                )
+                rgb_path = cont.observations.image.ego.ego_cam_px.rgb
+                assert (
+                    bytearray(
+                        arrays["observations/image/ego/ego_cam_px/rgb"][win_idx]
+                    ).decode()
+                    == rgb_path
+                )
@@ -1,7 +1,10 @@
 # global
 import os
 import ivy
+import struct
 import pytest
+import threading
+import numpy as np
 
 # local
 import ivy_builder.builder as builder
@@ -104,7 +107,8 @@ def test_visualizing(dev_str, compile_mode, fw):
 
 
 @pytest.mark.parametrize("compile_mode", ["all", False])
-def test_checkpoint_loading(dev_str, compile_mode, fw):
+@pytest.mark.parametrize("async_checkpointing", [False, True])
+def test_checkpoint_loading(dev_str, compile_mode, async_checkpointing, fw):
     if fw == "numpy":
         pytest.skip()
     compile_mode = compile_mode
@@ -115,6 +119,7 @@ def test_checkpoint_loading(dev_str, compile_mode, fw):
         "total_iterations": 10,
         "ld_chkpt": False,
         "save_freq": 1,
+        "async_checkpointing": async_checkpointing,
         "compile_mode": compile_mode,
     }
     trainer = builder.build_trainer(
@@ -131,6 +136,7 @@ def test_checkpoint_loading(dev_str, compile_mode, fw):
         "total_iterations": 20,
         "ld_chkpt": True,
         "save_freq": 1,
+        "async_checkpointing": async_checkpointing,
         "compile_mode": compile_mode,
     }
     trainer = builder.build_trainer(
@@ -150,6 +156,38 @@ def test_checkpoint_loading(dev_str, compile_mode, fw):
     builder_helpers.remove_dirs()
 
 
+@pytest.mark.parametrize("async_checkpointing", [False, True])
+def test_checkpoint_retention(dev_str, async_checkpointing, fw):
+    if fw == "numpy":
+        pytest.skip()
+
+    builder_helpers.remove_dirs()
+    data_loader_spec_args = {"batch_size": 1, "dev_strs": [dev_str]}
+    trainer_spec_args = {
+        "total_iterations": 10,
+        "ld_chkpt": False,
+        "save_freq": 1,
+        "async_checkpointing": async_checkpointing,
+        "max_checkpoints_to_keep": 3,
+        "keep_checkpoint_every_n_steps": 4,
+    }
+    trainer = builder.build_trainer(
+        ExampleDataLoaderMin,
+        ExampleNetworkMin,
+        ExampleTrainerMin,
+        data_loader_spec_args=data_loader_spec_args,
+        trainer_spec_args=trainer_spec_args,
+    )
+    trainer.setup()
+    trainer.train()
+    trainer.close()
+    checkpoint_nums = [
+        int(fname.split("-")[-1].split(".")[0]) for fname in os.listdir("log/chkpts")
+    ]
+    assert sorted(checkpoint_nums) == [0, 4, 7, 8, 9]
+    builder_helpers.remove_dirs()
+
+
 @pytest.mark.parametrize("compile_mode", ["all", False])
 def test_reduced_cost_after_checkpoint_load(dev_str, compile_mode, fw):
     if fw == "numpy":
@@ -323,3 +361,264 @@ def test_checkpoint_save_and_restore_via_public_trainer_methods(
     trainer.close()
     assert os.path.exists(chkpt3_path)
     builder_helpers.remove_dirs()
+
+
+def test_mmap_checkpoint_restore(dev_str, fw):
+    if fw == "numpy":
+        pytest.skip()
+    builder_helpers.remove_dirs()
+    data_loader_spec_args = {"batch_size": 1, "dev_strs": [dev_str]}
+    trainer_spec_args = {
+        "total_iterations": 10,
+        "ld_chkpt": False,
+        "save_freq": 1,
+        "checkpoint_format": "mmap",
+    }
+    trainer = builder.build_trainer(
+        ExampleDataLoaderMin,
+        ExampleNetworkMin,
+        ExampleTrainerMin,
+        data_loader_spec_args=data_loader_spec_args,
+        trainer_spec_args=trainer_spec_args,
+    )
+    trainer.setup()
+    chkpt_path = os.path.join("chkpt/", "test_chkpt.mmap")
+    trainer.save(chkpt_path)
+    saved_v = trainer._network.v.cont_map(lambda x, kc: ivy.to_numpy(x))
+    trainer.train()
+    assert os.path.exists("log/chkpts/chkpt-9.mmap")
+    trained_v = trainer._network.v.cont_map(lambda x, kc: ivy.to_numpy(x))
+
+    # partial restore, of only the first variable
+    key_chains = [kc for kc, _ in saved_v.cont_to_iterator()]
+    trainer.restore(chkpt_path, v_keychains=key_chains[0:1])
+    for i, kc in enumerate(key_chains):
+        expected = saved_v if i == 0 else trained_v
+        assert np.allclose(
+            ivy.to_numpy(trainer._network.v.cont_at_key_chain(kc)),
+            expected.cont_at_key_chain(kc),
+        )
+
+    # full restore
+    trainer.restore(chkpt_path)
+    for kc in key_chains:
+        assert np.allclose(
+            ivy.to_numpy(trainer._network.v.cont_at_key_chain(kc)),
+            saved_v.cont_at_key_chain(kc),
+        )
+    trainer.close()
+    builder_helpers.remove_dirs()
+
+
+@pytest.mark.parametrize("async_checkpointing", [False, True])
+def test_incremental_checkpoints(dev_str, async_checkpointing, fw):
+    if fw == "numpy":
+        pytest.skip()
+    builder_helpers.remove_dirs()
+    data_loader_spec_args = {"batch_size": 1, "dev_strs": [dev_str]}
+    trainer_spec_args = {
+        "total_iterations": 10,
+        "ld_chkpt": False,
+        "save_freq": 1,
+        "async_checkpointing": async_checkpointing,
+        "max_checkpoints_to_keep": 3,
+        "checkpoint_format": "incremental",
+    }
+    trainer = builder.build_trainer(
+        ExampleDataLoaderMin,
+        ExampleNetworkMin,
+        ExampleTrainerMin,
+        data_loader_spec_args=data_loader_spec_args,
+        trainer_spec_args=trainer_spec_args,
+    )
+    trainer.setup()
+    trainer.train()
+    chkpt_manager = trainer._chkpt_manager
+    chkpt_manager.wait()
+    shards_dir = os.path.join("log", "chkpts", "shards")
+    shard_fnames = set(os.listdir(shards_dir))
+
+    # unchanged variables are referenced, rather than written again
+    chkpt_manager.save(100)
+    chkpt_manager.wait()
+    assert set(os.listdir(shards_dir)) <= shard_fnames
+    assert chkpt_manager.latest_checkpoint_fpath.endswith("chkpt-100.shards")
+
+    # restore from the shards
+    v = trainer._network.v.cont_map(lambda x, kc: ivy.to_numpy(x))
+    trainer.restore(chkpt_manager.latest_checkpoint_fpath)
+    for kc, x in v.cont_to_iterator():
+        assert np.allclose(ivy.to_numpy(trainer._network.v.cont_at_key_chain(kc)), x)
+    trainer.close()
+
+    # only the shards of the kept checkpoints remain
+    assert len(chkpt_manager.checkpoint_fpaths) == 3
+    assert len(os.listdir(shards_dir)) <= len(shard_fnames)
+    builder_helpers.remove_dirs()
+
+
+@pytest.mark.parametrize("async_checkpointing", [False, True])
+def test_incremental_checkpoint_intermediate_restore(dev_str, async_checkpointing, fw):
+    if fw == "numpy":
+        pytest.skip()
+    builder_helpers.remove_dirs()
+    data_loader_spec_args = {"batch_size": 1, "dev_strs": [dev_str]}
+    trainer_spec_args = {
+        "total_iterations": 3,
+        "ld_chkpt": False,
+        "save_freq": 1,
+        "async_checkpointing": async_checkpointing,
+        "max_checkpoints_to_keep": None,
+        "checkpoint_format": "incremental",
+    }
+    trainer = builder.build_trainer(
+        ExampleDataLoaderMin,
+        ExampleNetworkMin,
+        ExampleTrainerMin,
+        data_loader_spec_args=data_loader_spec_args,
+        trainer_spec_args=trainer_spec_args,
+    )
+    trainer.setup()
+
+    # the variables trained up to an intermediate step, and then trained further
+    trainer.train()
+    trainer._chkpt_manager.wait()
+    intermediate_v = trainer._network.v.cont_map(lambda x, kc: ivy.to_numpy(x))
+    trainer.train(3, 6)
+    trainer._chkpt_manager.wait()
+    final_v = trainer._network.v.cont_map(lambda x, kc: ivy.to_numpy(x))
+    assert not all(
+        [
+            np.allclose(x, final_v.cont_at_key_chain(kc))
+            for kc, x in intermediate_v.cont_to_iterator()
+        ]
+    )
+
+    # both steps restore the values they were trained to
+    chkpts_dir = os.path.join("log", "chkpts")
+    for step, v in [(2, intermediate_v), (5, final_v)]:
+        trainer.restore(os.path.join(chkpts_dir, "chkpt-{}.shards".format(step)))
+        for kc, x in v.cont_to_iterator():
+            assert np.allclose(
+                ivy.to_numpy(trainer._network.v.cont_at_key_chain(kc)), x
+            )
+    trainer.close()
+    builder_helpers.remove_dirs()
+
+
+def test_nested_stats(dev_str, fw):
+    if fw == "numpy":
+        pytest.skip()
+    from ivy_builder.summaries import nested_stats
+
+    a = np.array([[1.0, -2.0], [3.0, -4.0]], dtype=np.float32)
+    b = np.array([0.5, -1.5, 2.5, 3.5], dtype=np.float32)
+    c = np.array([-6.0, 7.0, 8.0], dtype=np.float32)
+    nest = ivy.Container(
+        {
+            "a": ivy.array(a, device=dev_str),
+            "sub": {
+                "b": ivy.array(b, device=dev_str),
+                "c": ivy.array(c, device=dev_str),
+            },
+        }
+    )
+    stats = dict(nested_stats(nest, ["mean", "abs_max", "var", "global_vector_norm"]))
+
+    # leaves of the same size are reduced together
+    for name, x in [("a", a), ("sub/b", b), ("sub/c", c)]:
+        assert np.allclose(stats[name + "/mean"], np.mean(x))
+        assert np.allclose(stats[name + "/abs max"], np.max(np.abs(x)))
+        assert np.allclose(stats[name + "/var"], np.var(x))
+        assert name + "/vector norm" not in stats
+
+    # global norms of the root and of every sub-container
+    sub_norm = np.sqrt(np.sum(b**2) + np.sum(c**2))
+    assert np.allclose(stats["sub/global vector norm"], sub_norm)
+    assert np.allclose(
+        stats["global vector norm"], np.sqrt(np.sum(a**2) + sub_norm**2)
+    )
+
+
+class _BlockingWriter:
+    def __init__(self):
+        self.scalars = list()
+        self.images = list()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def add_scalar(self, tag, value, global_step, walltime=None):
+        self.entered.set()
+        self.release.wait()
+        self.scalars.append((tag, value, global_step))
+
+    def add_image(self, tag, img_tensor, global_step):
+        self.images.append((tag, global_step))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_async_summary_writer():
+    from ivy_builder.summaries import AsyncSummaryWriter
+
+    blocking_writer = _BlockingWriter()
+    writer = AsyncSummaryWriter(blocking_writer, max_queue_size=2)
+    writer.add_scalar("a", 0.0, 0)
+    blocking_writer.entered.wait()
+
+    # while the writer is blocked, scalars with the same tag and step are coalesced,
+    # and the oldest are dropped once the queue is full
+    writer.add_scalar("a", 1.0, 1)
+    writer.add_scalar("a", 2.0, 1)
+    writer.add_scalars([("b", 3.0), ("c", 4.0)], 1)
+
+    # other summaries are passed straight to the wrapped writer
+    writer.add_image("img", np.zeros((3, 2, 2)), 1)
+    assert blocking_writer.images == [("img", 1)]
+    blocking_writer.release.set()
+    writer.close()
+    assert blocking_writer.scalars == [("a", 0.0, 0), ("b", 3.0, 1), ("c", 4.0, 1)]
+    assert writer.num_dropped == 1
+
+
+def test_event_file_writer():
+    from ivy_builder.summaries import (
+        EventFileWriter,
+        AsyncSummaryWriter,
+        _masked_crc32c,
+    )
+
+    builder_helpers.remove_dirs()
+    log_dir = os.path.join("log", "tnsrbrd")
+    writer = AsyncSummaryWriter(EventFileWriter(log_dir))
+    writer.add_scalars([("x", 1.5), ("y", 2.0)], 3)
+    # summaries which need torch are ignored, and the step is optional
+    writer.add_image("img", np.zeros((3, 2, 2)), 3)
+    writer.add_histogram("hist", np.zeros(4), 3)
+    writer.add_scalar("z", 0.5)
+    writer.close()
+
+    # the file version record, followed by one record per scalar
+    fnames = os.listdir(log_dir)
+    assert len(fnames) == 1 and fnames[0].startswith("events.out.tfevents.")
+    with open(os.path.join(log_dir, fnames[0]), "rb") as f:
+        data = f.read()
+    records = list()
+    while data:
+        (length,) = struct.unpack("<Q", data[:8])
+        assert struct.unpack("<I", data[8:12])[0] == _masked_crc32c(data[:8])
+        record = data[12 : 12 + length]
+        assert struct.unpack("<I", data[12 + length : 16 + length])[0] == (
+            _masked_crc32c(record)
+        )
+        records.append(record)
+        data = data[16 + length :]
+    assert len(records) == 4
+    assert b"brain.Event:2" in records[0]
+    assert b"x" in records[1] and struct.pack("<f", 1.5) in records[1]
+    assert b"z" in records[3] and struct.pack("<f", 0.5) in records[3]
+    builder_helpers.remove_dirs()
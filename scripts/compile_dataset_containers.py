@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# global
+import logging
+import os
+import ivy
+import json
+import argparse
+import numpy as np
+
+# local
+from ivy_builder.array_store import save_arrays
+
+
+def _to_array(x):
+    # matches SeqDataLoader._to_tensor(x)[0], as applied when parsing the json strings
+    if isinstance(x, str):
+        return np.array([list(x.encode())], dtype=np.uint8)
+    return np.array(x, dtype=np.float32)[0]
+
+
+def compile_sequence(cont_fpaths, out_fpath):
+    frames = list()
+    for cont_fpath in cont_fpaths:
+        with open(cont_fpath, "r") as file:
+            cont = ivy.Container(json.load(file))
+        frames.append(dict(zip(cont.cont_all_key_chains(), cont.cont_to_flat_list())))
+    arrays = dict()
+    for key_chain in frames[0].keys():
+        columns = [_to_array(frame[key_chain]) for frame in frames]
+        shapes = set([c.shape for c in columns])
+        if len(shapes) > 1:
+            raise Exception(
+                "key chain {} has inconsistent shapes {} across the containers "
+                "{}".format(key_chain, shapes, cont_fpaths)
+            )
+        arrays[key_chain] = np.concatenate(columns, axis=0)
+    save_arrays(out_fpath, arrays, meta={"num_frames": len(cont_fpaths)})
+
+
+def compile_containers(cont_dir, out_dir, out_fname_template="%06d.mmap"):
+    cont_fnames = [fname for fname in os.listdir(cont_dir) if fname.endswith(".json")]
+    cont_fnames.sort()
+    seqs = dict()
+    for cont_fname in cont_fnames:
+        seq_idx = int(cont_fname.split("_")[0])
+        if seq_idx not in seqs:
+            seqs[seq_idx] = list()
+        seqs[seq_idx].append(os.path.join(cont_dir, cont_fname))
+
+    os.makedirs(out_dir, exist_ok=True)
+    num_seqs = len(seqs)
+    num_logs = 100
+    log_freq = max(int(num_seqs / num_logs), 1)
+    for i, (seq_idx, cont_fpaths) in enumerate(seqs.items()):
+        if i % log_freq == 0:
+            logging.info("compiling sequence {} of {}...".format(i, num_seqs))
+        compile_sequence(
+            cont_fpaths, os.path.join(out_dir, out_fname_template % seq_idx)
+        )
+
+
+def main(container_dir=None, output_dir=None):
+    container_dir = ivy.default(container_dir, os.getcwd())
+    output_dir = ivy.default(
+        output_dir,
+        os.path.join(
+            os.path.dirname(os.path.abspath(container_dir)), "containers_mmap"
+        ),
+    )
+    compile_containers(container_dir, output_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-cd",
+        "--container_dir",
+        type=str,
+        help="The directory containing the container json files to compile.",
+    )
+    parser.add_argument(
+        "-od",
+        "--output_dir",
+        type=str,
+        help="The directory to write the compiled sequence files to. Defaults to "
+        "containers_mmap next to the container directory, which is where the "
+        "mmap container_load_mode of SeqDataLoader looks for them.",
+    )
+    parsed_args = parser.parse_args()
+    main(parsed_args.container_dir, parsed_args.output_dir)
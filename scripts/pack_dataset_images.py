@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# global
+import logging
+import os
+import ivy
+import json
+import argparse
+import numpy as np
+
+try:
+    import cv2
+except ModuleNotFoundError:
+    cv2 = None
+
+# local
+from ivy_builder.array_store import save_arrays
+
+IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".exr")
+
+
+def _is_img_key_chain(key_chain, value, img_strs):
+    if not isinstance(value, str):
+        return False
+    if img_strs:
+        return any([img_str in key_chain for img_str in img_strs])
+    return value.lower().endswith(IMG_EXTS)
+
+
+def pack_sequence(cont_dir, cont_fpaths, out_fpath, img_strs=None):
+    frames = list()
+    for cont_fpath in cont_fpaths:
+        with open(cont_fpath, "r") as file:
+            cont = ivy.Container(json.load(file))
+        frames.append(dict(zip(cont.cont_all_key_chains(), cont.cont_to_flat_list())))
+    arrays = dict()
+    paths = dict()
+    for key_chain, value in frames[0].items():
+        if not _is_img_key_chain(key_chain, value, img_strs):
+            continue
+        # images are stored exactly as returned by cv2.imread(fpath, -1), and
+        # converted by the data loader, so uint8 and float images are packed alike
+        imgs = list()
+        for frame in frames:
+            img = cv2.imread(
+                os.path.abspath(os.path.join(cont_dir, frame[key_chain])), -1
+            )
+            if img is None:
+                raise Exception(
+                    "failed to decode image {} for key chain {}".format(
+                        frame[key_chain], key_chain
+                    )
+                )
+            imgs.append(img)
+        shapes = set([img.shape for img in imgs])
+        if len(shapes) > 1:
+            raise Exception(
+                "key chain {} has inconsistent image shapes {} across the "
+                "containers {}".format(key_chain, shapes, cont_fpaths)
+            )
+        arrays[key_chain] = np.stack(imgs, axis=0)
+        paths[key_chain] = [frame[key_chain] for frame in frames]
+    save_arrays(out_fpath, arrays, meta={"paths": paths})
+
+
+def pack_images(cont_dir, out_dir, img_strs=None, out_fname_template="%06d.shard"):
+    if not ivy.exists(cv2):
+        raise Exception(
+            "in order to pack images, opencv for python must be installed."
+            "To install opencv, run pip install opencv-python."
+        )
+    cont_fnames = [fname for fname in os.listdir(cont_dir) if fname.endswith(".json")]
+    cont_fnames.sort()
+    seqs = dict()
+    for cont_fname in cont_fnames:
+        seq_idx = int(cont_fname.split("_")[0])
+        if seq_idx not in seqs:
+            seqs[seq_idx] = list()
+        seqs[seq_idx].append(os.path.join(cont_dir, cont_fname))
+
+    os.makedirs(out_dir, exist_ok=True)
+    num_seqs = len(seqs)
+    num_logs = 100
+    log_freq = max(int(num_seqs / num_logs), 1)
+    for i, (seq_idx, cont_fpaths) in enumerate(seqs.items()):
+        if i % log_freq == 0:
+            logging.info("packing images of sequence {} of {}...".format(i, num_seqs))
+        pack_sequence(
+            cont_dir,
+            cont_fpaths,
+            os.path.join(out_dir, out_fname_template % seq_idx),
+            img_strs,
+        )
+
+
+def main(container_dir=None, output_dir=None, img_strs=None):
+    container_dir = ivy.default(container_dir, os.getcwd())
+    output_dir = ivy.default(
+        output_dir,
+        os.path.join(os.path.dirname(os.path.abspath(container_dir)), "img_shards"),
+    )
+    pack_images(container_dir, output_dir, img_strs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-cd",
+        "--container_dir",
+        type=str,
+        help="The directory containing the container json files which reference the "
+        "images to pack.",
+    )
+    parser.add_argument(
+        "-od",
+        "--output_dir",
+        type=str,
+        help="The directory to write the image shards to. Defaults to img_shards next "
+        "to the container directory, which is where the shards img_mode of "
+        "SeqDataLoader looks for them.",
+    )
+    parser.add_argument(
+        "-is",
+        "--img_strs",
+        type=str,
+        nargs="+",
+        help="Key chain substrings of the images to pack, matched in the same manner "
+        "as uint8_strs and float_strs. Defaults to all entries with an image "
+        "file extension.",
+    )
+    parsed_args = parser.parse_args()
+    main(parsed_args.container_dir, parsed_args.output_dir, parsed_args.img_strs)
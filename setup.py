@@ -131,6 +131,8 @@ setup(
         "scripts/remove_checkpoints.py",
         "scripts/reset_to_defaults.sh",
         "scripts/format_dataset_containers.py",
+        "scripts/compile_dataset_containers.py",
+        "scripts/pack_dataset_images.py",
     ],
     classifiers=["License :: OSI Approved :: Apache Software License"],
     license="Apache 2.0",